@@ -4,7 +4,7 @@ main.py
 FastAPI application for PDF Text-to-Speech (TTS) and Retrieval-Augmented Generation (RAG) services.
 
 Features:
-- Upload PDF files, extract sentences and bounding boxes, and trigger RAG indexing
+- Upload PDF files, extract sentences and bounding boxes, and queue RAG indexing
 - Synthesize audio for sentences using TTS
 - List available TTS voices/styles
 - Check RAG indexing status
@@ -12,29 +12,63 @@ Features:
 
 Environment Variables:
 - RAG_SERVICE_URL: URL for the RAG service (default: http://rag-service:8000)
+- REDIS_URL: Redis used as the RAG indexing job queue (default: redis://redis:6379)
 """
 import os
 import uuid
 import hashlib
+from contextlib import asynccontextmanager
 import httpx
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Form
+import orjson
+from arq import create_pool
+from arq.connections import RedisSettings
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
 
 
 # Local imports
-from .tts import tts_sentence_to_wav, list_voice_styles
+from .tts import tts_sentence_to_wav_async, tts_sentences_to_wavs_async, tts_sentences_parallel, list_voice_styles
 from .pdf_service import PDFService
 
 
 
 API_PREFIX = "/api"
 AUDIO_DIR = "/data/audio"
+# Most sentences synthesized by one batch request, so one request cannot hold the TTS pool for long
+MAX_TTS_BATCH = 16
 # RAG service URL (can be overridden by environment variable)
 RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://rag-service:8000")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
 
 
-app = FastAPI(title="PDF TTS")
+# One pooled client for the RAG status checks, so connections are kept alive
+# across requests instead of being set up per call. Indexing calls are made by the arq worker.
+rag_client = httpx.AsyncClient(
+    base_url=RAG_SERVICE_URL,
+    timeout=5.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pdf_service.job_queue = await create_pool(RedisSettings.from_dsn(REDIS_URL))
+    yield
+    await pdf_service.job_queue.close()
+    await rag_client.aclose()
+    pdf_service.cpu_pool.shutdown(cancel_futures=True)
+
+
+def get_rag_client() -> httpx.AsyncClient:
+    """Dependency returning the shared RAG service client."""
+    return rag_client
+
+
+app = FastAPI(title="PDF TTS", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # TODO: tighten in production
@@ -43,15 +77,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class GZipRoute(APIRoute):
+    """API route whose responses are gzip-compressed for clients that accept it."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.app = GZipMiddleware(self.app, minimum_size=1024, compresslevel=5)
+
+
+# Upload responses carry the bounding boxes of every sentence and compress very well.
+# Only they are compressed: audio and PDFs under /data gain next to nothing and are
+# fetched with range requests.
+gzip_router = APIRouter(route_class=GZipRoute)
+
 # Ensure audio and static directories exist
 os.makedirs(AUDIO_DIR, exist_ok=True)
 os.makedirs("/static", exist_ok=True)
 
 
 
-pdf_service = PDFService(static_dir="/static", rag_service_url=RAG_SERVICE_URL)
+pdf_service = PDFService(static_dir="/static")
 
-@app.post(f"{API_PREFIX}/upload")
+@gzip_router.post(f"{API_PREFIX}/upload")
 async def upload_pdf(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
@@ -70,6 +117,9 @@ async def upload_pdf(
     return await pdf_service.process_upload(file, embedding_model, background_tasks)
 
 
+app.include_router(gzip_router)
+
+
 @app.get(f"{API_PREFIX}/voices")
 async def get_voices():
     """
@@ -99,28 +149,82 @@ async def synthesize_sentence(payload: dict):
     speed = payload.get("speed", 1.0)
     if not text:
         raise HTTPException(status_code=400, detail="Missing 'text' in payload.")
-    path = tts_sentence_to_wav(text, AUDIO_DIR, voice_style=voice, speed=speed)
+    path = await tts_sentence_to_wav_async(text, AUDIO_DIR, voice_style=voice, speed=speed)
     rel = os.path.relpath(path, "/")
     url = f"/{rel}"
     return {"audioUrl": url}
 
 
+def _batch_texts(payload: dict) -> list[str]:
+    """Return the payload's 'texts', checked to be a non-empty list of at most MAX_TTS_BATCH strings."""
+    texts = payload.get("texts")
+    if not texts or not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        raise HTTPException(status_code=400, detail="'texts' must be a non-empty list of strings.")
+    if len(texts) > MAX_TTS_BATCH:
+        raise HTTPException(status_code=400, detail=f"'texts' may hold at most {MAX_TTS_BATCH} sentences.")
+    return texts
+
+
+@app.post(f"{API_PREFIX}/tts/batch")
+async def synthesize_sentences(payload: dict):
+    """
+    Synthesize audio for several sentences in one batched TTS run.
+    
+    Args:
+        payload (dict): Should contain 'texts' (list of str), 'voice', and optional 'speed'.
+    Returns:
+        dict: URLs to the generated audio files, in the same order as 'texts'.
+    Raises:
+        HTTPException: If 'texts' is not a non-empty list of strings of at most MAX_TTS_BATCH items.
+    """
+    texts = _batch_texts(payload)
+    voice = payload.get("voice")
+    speed = payload.get("speed", 1.0)
+    paths = await tts_sentences_to_wavs_async(texts, AUDIO_DIR, voice_style=voice, speed=speed)
+    return {"audioUrls": [f"/{os.path.relpath(path, '/')}" for path in paths]}
+
+
+@app.post(f"{API_PREFIX}/tts/stream")
+async def stream_sentences(payload: dict):
+    """
+    Synthesize several sentences concurrently and stream their audio URLs as they become ready.
+    
+    Args:
+        payload (dict): Should contain 'texts' (list of str), 'voice', and optional 'speed'.
+    Returns:
+        StreamingResponse: Newline-delimited JSON, one {"index", "audioUrl"} object per sentence, in order.
+    Raises:
+        HTTPException: If 'texts' is not a non-empty list of strings of at most MAX_TTS_BATCH items.
+    """
+    texts = _batch_texts(payload)
+    voice = payload.get("voice")
+    speed = payload.get("speed", 1.0)
+
+    async def lines():
+        index = 0
+        async for path in tts_sentences_parallel(texts, AUDIO_DIR, voice_style=voice, speed=speed):
+            yield orjson.dumps({"index": index, "audioUrl": f"/{os.path.relpath(path, '/')}"}) + b"\n"
+            index += 1
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get(f"{API_PREFIX}/rag_status")
-async def check_rag_status(collection_name: str):
+async def check_rag_status(collection_name: str, client: httpx.AsyncClient = Depends(get_rag_client)):
     """
     Check the status of RAG indexing for a collection.
     
     Args:
         collection_name (str): Name of the collection to check status for.
+        client (httpx.AsyncClient): Shared RAG service client (injected).
     Returns:
         dict: Status information from the RAG service.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{RAG_SERVICE_URL}/status", params={"collection_name": collection_name})
-            return resp.json()
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+    try:
+        resp = await client.get("/status", params={"collection_name": collection_name})
+        return resp.json()
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 @app.get("/health")
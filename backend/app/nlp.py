@@ -1,31 +1,91 @@
 
-import spacy
+import re
+from functools import lru_cache
 
-_nlp = spacy.load("en_core_web_sm")
+# A sentence end: terminal punctuation, any closing quotes/brackets (ASCII, curly and guillemet),
+# then whitespace. The word before the punctuation is captured so abbreviations can be recognised.
+_BOUNDARY_RE = re.compile(r"(\w*)[.!?][\"')\]\u201d\u2019\u00bb]*\s+")
+# The start of a new sentence: an uppercase letter. Sentences opening with a quote or bracket are left
+# to spaCy, whose sentencizer attaches that opening mark to the end of the previous sentence.
+_SENTENCE_START_RE = re.compile(r"[A-Z]")
+# Words that are usually followed by a period without ending the sentence.
+_ABBREVIATIONS = frozenset({
+    "al", "approx", "ch", "co", "cf", "corp", "dept", "dr", "eq", "eqs", "est", "etc", "fig", "figs",
+    "inc", "jr", "ltd", "mr", "mrs", "ms", "mt", "no", "nos", "pp", "prof", "ref", "refs", "sec",
+    "sr", "st", "tab", "vol", "vs",
+})
+
+@lru_cache(maxsize=1)
+def get_nlp():
+    """
+    Load the spaCy pipeline on first use and reuse it afterwards.
+
+    Loading is deferred so that importing this module (and starting workers that never
+    split text) does not pay for the model. Only sentence boundaries are used, so the
+    statistical components are excluded and the rule-based sentencizer does the splitting.
+    """
+    import spacy
+    nlp = spacy.load(
+        "en_core_web_sm",
+        exclude=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"],
+    )
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+def _fast_split(chunk: str):
+    """
+    Split a chunk on unambiguous sentence boundaries with a single regex pass.
+
+    A boundary is unambiguous when the next sentence starts with an uppercase letter and the
+    word before the punctuation is neither a known abbreviation nor a single letter (initials,
+    "e.g.", "i.e."). Chunks with any other candidate boundary are left to spaCy.
+
+    Args:
+        chunk (str): A stripped, non-empty chunk of text.
+
+    Returns:
+        list[str] | None: The sentences, or None if the chunk needs the spaCy pipeline.
+    """
+    parts = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(chunk):
+        end = match.end()
+        word = match.group(1)
+        if end == len(chunk):
+            break
+        if not _SENTENCE_START_RE.match(chunk, end) or len(word) == 1 or word.lower() in _ABBREVIATIONS:
+            return None
+        parts.append(chunk[start:end])
+        start = end
+    parts.append(chunk[start:])
+    return parts
 
 def split_into_sentences(text: str):
     """
     Splits the input text into sentences, preserving paragraph and header boundaries.
-    
-    The function first splits the text by double newlines to respect hard boundaries (such as headers and paragraphs),
-    then uses spaCy to further split each chunk into sentences.
-    
+
+    The function first splits the text by double newlines to respect hard boundaries (such as headers and paragraphs).
+    Chunks whose sentence boundaries are all unambiguous are split with a regex; the rest are split by spaCy,
+    processed in batches with `nlp.pipe`. The spaCy model is only loaded if some chunk needs it.
+
     Args:
         text (str): The input text to split.
-    
+
     Returns:
         list[dict]: A list of dictionaries, each containing an 'id' and 'text' for each sentence.
     """
-    chunks = text.split("\n\n")
+    chunks = [chunk.strip() for chunk in text.split("\n\n")]
+    chunks = [chunk for chunk in chunks if chunk]
+    fast_parts = [_fast_split(chunk) for chunk in chunks]
+    slow_chunks = [chunk for chunk, parts in zip(chunks, fast_parts) if parts is None]
+    slow_docs = iter(get_nlp().pipe(slow_chunks, batch_size=64)) if slow_chunks else None
     sentences = []
     global_id = 0
-    for chunk in chunks:
-        chunk = chunk.strip()
-        if not chunk:
-            continue
-        doc = _nlp(chunk)
-        for sent in doc.sents:
-            s = sent.text.strip()
+    for parts in fast_parts:
+        if parts is None:
+            parts = [sent.text for sent in next(slow_docs).sents]
+        for part in parts:
+            s = part.strip()
             if s:
                 sentences.append({"id": global_id, "text": s})
                 global_id += 1
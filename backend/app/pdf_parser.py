@@ -1,5 +1,14 @@
 
-import fitz  # PyMuPDF
+import asyncio
+
+import numpy as np
+
+# PyMuPDF (`fitz`) is imported inside the functions that need it, so importing this
+# module (e.g. in API workers that never parse a PDF) stays cheap.
+
+# char_map is stored column-wise (one NumPy array per field, index-aligned with the text)
+# instead of as one dict per character.
+CHAR_COLUMNS = ("page", "x", "y", "width", "height")
 
 def _get_table_bboxes(page):
     """
@@ -7,10 +16,10 @@ def _get_table_bboxes(page):
     Args:
         page: PyMuPDF page object.
     Returns:
-        List of fitz.Rect objects representing table bounding boxes.
+        List of (x0, y0, x1, y1) tuples representing table bounding boxes.
     """
     tables = page.find_tables()
-    return [fitz.Rect(t.bbox) for t in tables]
+    return [tuple(t.bbox) for t in tables]
 
 def _get_image_bboxes(page):
     """
@@ -18,170 +27,250 @@ def _get_image_bboxes(page):
     Args:
         page: PyMuPDF page object.
     Returns:
-        List of fitz.Rect objects representing image bounding boxes.
+        List of (x0, y0, x1, y1) tuples, one per image placement on the page.
+    """
+    return [tuple(info["bbox"]) for info in page.get_image_info()]
+
+def _rects_to_array(rects):
+    """
+    Convert rects into an (N, 4) array of (x0, y0, x1, y1).
+    Args:
+        rects: List of fitz.Rect objects or (x0, y0, x1, y1) tuples.
+    Returns:
+        np.ndarray of shape (N, 4).
     """
-    image_bboxes = []
-    for img in page.get_images():
-        rects = page.get_image_rects(img[0])
-        image_bboxes.extend(rects)
-    return image_bboxes
+    return np.array([tuple(r) for r in rects], dtype=np.float64).reshape(-1, 4)
 
-def _is_block_filtered(bbox, header_height, footer_y, table_bboxes, image_bboxes):
+def _points_in_rects(points, rects):
     """
-    Determine if a text block should be filtered out (header, footer, table, or image).
+    Vectorized point-in-rect test with the same half-open bounds as `fitz.Point in fitz.Rect`.
     Args:
-        bbox: fitz.Rect of the block.
+        points: (N, 2) array of (x, y).
+        rects: (M, 4) array of (x0, y0, x1, y1).
+    Returns:
+        Boolean array of length N, True where the point lies inside any of the rects.
+    """
+    if rects.size == 0:
+        return np.zeros(len(points), dtype=bool)
+    x = points[:, 0, None]
+    y = points[:, 1, None]
+    inside = (x >= rects[:, 0]) & (x < rects[:, 2]) & (y >= rects[:, 1]) & (y < rects[:, 3])
+    return inside.any(axis=1)
+
+def _filtered_block_mask(blocks, header_height, footer_y, table_bboxes, image_bboxes):
+    """
+    Determine which text blocks should be filtered out (header, footer, table, or image).
+    Evaluated for all blocks of a page at once.
+    Args:
+        blocks: List of block dictionaries from PyMuPDF rawdict.
         header_height: Height of the header region.
         footer_y: Y-coordinate of the footer region start.
         table_bboxes: List of table bounding boxes.
         image_bboxes: List of image bounding boxes.
     Returns:
-        True if the block should be filtered, False otherwise.
+        Boolean array, True for each block that should be filtered.
     """
-    if bbox.y1 < header_height or bbox.y0 > footer_y:
-        return True
-    block_center = fitz.Point((bbox.x0 + bbox.x1)/2, (bbox.y0 + bbox.y1)/2)
-    if any(block_center in t_bbox for t_bbox in table_bboxes):
-        return True
-    if any(block_center in i_bbox for i_bbox in image_bboxes):
-        return True
-    return False
+    bboxes = np.array([b["bbox"] for b in blocks], dtype=np.float64).reshape(-1, 4)
+    centers = np.column_stack(((bboxes[:, 0] + bboxes[:, 2]) / 2, (bboxes[:, 1] + bboxes[:, 3]) / 2))
+    mask = (bboxes[:, 3] < header_height) | (bboxes[:, 1] > footer_y)
+    mask |= _points_in_rects(centers, _rects_to_array(table_bboxes))
+    mask |= _points_in_rects(centers, _rects_to_array(image_bboxes))
+    return mask
 
-def _process_line(line, page_num, page_height, page_width):
+def _process_line(line):
     """
     Process a line from a text block and extract text and character coordinates.
+    Boxes are passed through exactly as rawdict reports them; the conversion to bottom-left
+    (x, y, width, height) happens once per page in `_to_columns`.
     Args:
         line: Line dictionary from PyMuPDF rawdict.
-        page_num: Page number (0-based).
-        page_height: Height of the page.
-        page_width: Width of the page.
     Returns:
-        Tuple of (line_text, line_chars) where line_text is the string and line_chars is a list of character info dicts.
+        Tuple of (line_text, line_boxes) where line_text is the string and line_boxes is a list of
+        (x0, y0, x1, y1) rawdict boxes, one per character.
     """
-    line_text = ""
-    line_chars = []
     spans = sorted(line.get("spans", []), key=lambda s: s["bbox"][0])
-    for span in spans:
-        chars = span.get("chars", [])
-        for char_info in chars:
-            c = char_info.get("c", "")
-            if not c:
-                continue
-            c_bbox = char_info.get("bbox", [0,0,0,0])
-            c_height = c_bbox[3] - c_bbox[1]
-            c_y_bottom = page_height - c_bbox[1] - c_height
-            line_text += c
-            line_chars.append({
-                "page": page_num + 1,
-                "x": c_bbox[0],
-                "y": c_y_bottom,
-                "width": c_bbox[2] - c_bbox[0],
-                "height": c_height,
-                "page_height": page_height,
-                "page_width": page_width
-            })
-    return line_text, line_chars
-
-def _process_block(block, page_num, page_height, page_width):
+    chars = [char_info for span in spans for char_info in span.get("chars", []) if char_info.get("c")]
+    line_text = "".join([char_info["c"] for char_info in chars])
+    line_boxes = [char_info.get("bbox", (0, 0, 0, 0)) for char_info in chars]
+    return line_text, line_boxes
+
+def _process_block(block):
     """
     Process a text block and extract its text and character coordinates.
     Args:
         block: Block dictionary from PyMuPDF rawdict.
-        page_num: Page number (0-based).
-        page_height: Height of the page.
-        page_width: Width of the page.
     Returns:
-        Tuple of (block_text, block_chars) where block_text is the string and block_chars is a list of character info dicts.
+        Tuple of (block_text, block_boxes) where block_boxes holds one (x0, y0, x1, y1)
+        rawdict box per character.
     """
-    block_text = ""
-    block_chars = []
+    block_parts = []
+    block_boxes = []
     for line in block.get("lines", []):
-        line_text, line_chars = _process_line(line, page_num, page_height, page_width)
+        line_text, line_boxes = _process_line(line)
         if line_text:
-            block_text += line_text
-            block_chars.extend(line_chars)
+            block_parts.append(line_text)
+            block_boxes.extend(line_boxes)
             if not line_text.endswith((" ", "\n", "\t")):
-                block_text += " "
-                if line_chars:
-                    last = line_chars[-1]
-                    block_chars.append({
-                        "page": last["page"],
-                        "x": last["x"] + last["width"],
-                        "y": last["y"],
-                        "width": last["width"],
-                        "height": last["height"],
-                        "page_height": last["page_height"],
-                        "page_width": last["page_width"],
-                        "is_space": True
-                    })
-    return block_text, block_chars
-
-def _finalize_block(block_text, block_chars, full_text, char_map):
-    """
-    Finalize a processed block by trimming whitespace, updating text and char map, and adding newlines.
+                block_parts.append(" ")
+                if line_boxes:
+                    x0, y0, x1, y1 = line_boxes[-1]
+                    block_boxes.append((x1, y0, 2 * x1 - x0, y1))
+    return "".join(block_parts), block_boxes
+
+def _finalize_block(block_text, block_boxes, page_parts, page_boxes):
+    """
+    Finalize a processed block by trimming whitespace, updating text and char columns, and adding newlines.
     Args:
         block_text: The text of the block.
-        block_chars: List of character info dicts for the block.
-        full_text: The full text accumulated so far.
-        char_map: The char map accumulated so far.
-    Returns:
-        Updated (full_text, char_map) with the block appended and newlines added.
+        block_boxes: List of (x0, y0, x1, y1) boxes for the block.
+        page_parts: The page text pieces accumulated so far (appended in place).
+        page_boxes: The page boxes accumulated so far (extended in place).
     """
     if block_text.strip():
-        while block_text and block_text[-1].isspace():
-            block_text = block_text[:-1]
-            if block_chars:
-                block_chars.pop()
-        full_text += block_text
-        char_map.extend(block_chars)
+        trimmed = block_text.rstrip()
+        trailing = len(block_text) - len(trimmed)
+        if trailing:
+            del block_boxes[-trailing:]
+        page_parts.append(trimmed)
+        page_boxes.extend(block_boxes)
         separator = "\n\n"
-        full_text += separator
-        if block_chars:
-            last = block_chars[-1]
+        page_parts.append(separator)
+        if block_boxes:
+            x0, y0, _, y1 = block_boxes[-1]
             for _ in range(2):
-                char_map.append({
-                    "page": last["page"],
-                    "x": last["x"],
-                    "y": last["y"],
-                    "width": 0,
-                    "height": last["height"],
-                    "page_height": last["page_height"],
-                    "page_width": last["page_width"],
-                    "is_newline": True
-                })
-    return full_text, char_map
-
-def extract_text_with_coordinates(data: bytes):
-    """
-    Extracts text and character coordinates from PDF bytes using PyMuPDF's rawdict.
+                page_boxes.append((x0, y0, x0, y1))
+
+def _to_columns(page_num, boxes, page_height):
+    """
+    Convert per-character boxes into char_map columns.
+    Args:
+        page_num: Page number (0-based).
+        boxes: List of (x0, y0, x1, y1) rawdict boxes (top-left origin).
+        page_height: Height of the page, used to flip y to a bottom-left origin.
+    Returns:
+        Dict mapping each name in CHAR_COLUMNS to a 1-D NumPy array.
+    """
+    x0, y0, x1, y1 = np.array(boxes, dtype=np.float64).reshape(-1, 4).T
+    return {
+        "page": np.full(len(boxes), page_num + 1, dtype=np.uint16),
+        "x": x0.astype(np.float32),
+        "y": (page_height - y1).astype(np.float32),
+        "width": (x1 - x0).astype(np.float32),
+        "height": (y1 - y0).astype(np.float32),
+    }
+
+def _process_page(page, page_num):
+    """
+    Extract text and character coordinates from a single PDF page.
+    Args:
+        page: PyMuPDF page object.
+        page_num: Page number (0-based).
+    Returns:
+        Tuple of (page_text, page_chars, page_size) where page_chars are char_map columns for the
+        page's unfiltered text blocks and page_size is (width, height).
+    """
+    import fitz  # PyMuPDF
+
+    page_height = page.rect.height
+    page_width = page.rect.width
+    table_bboxes = _get_table_bboxes(page)
+    image_bboxes = _get_image_bboxes(page)
+    header_height = page_height * 0.05
+    footer_y = page_height * 0.95
+    text_page = page.get_text("rawdict", flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+    blocks = text_page.get("blocks", [])
+    text_blocks = [b for b in blocks if b.get("type") == 0]
+    sorted_blocks = sorted(text_blocks, key=lambda b: (b["bbox"][1] // 10, b["bbox"][0]))
+    page_parts = []
+    page_boxes = []
+    filtered = _filtered_block_mask(sorted_blocks, header_height, footer_y, table_bboxes, image_bboxes)
+    for block, is_filtered in zip(sorted_blocks, filtered.tolist()):
+        if is_filtered:
+            continue
+        block_text, block_boxes = _process_block(block)
+        _finalize_block(block_text, block_boxes, page_parts, page_boxes)
+    return "".join(page_parts), _to_columns(page_num, page_boxes, page_height), (page_width, page_height)
+
+def _open_document(source):
+    """
+    Open a PDF with PyMuPDF.
+    Args:
+        source: Path to a PDF file, or the PDF contents as bytes.
+    Returns:
+        fitz.Document. Paths are opened directly from disk, avoiding an in-memory copy.
+    """
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def _extract_page(source, page_num):
+    """
+    Process-pool entry point: extract one page of a PDF.
+    PyMuPDF documents cannot be shared across processes, so each call opens its own handle.
+    Args:
+        source: Path to the PDF file, or its contents as bytes.
+        page_num: Page number (0-based).
+    Returns:
+        Tuple of (page_text, page_chars, page_size).
+    """
+    with _open_document(source) as doc:
+        return _process_page(doc[page_num], page_num)
+
+def _merge_pages(pages):
+    """
+    Concatenate per-page results in page order.
+    Args:
+        pages: List of (page_text, page_chars, page_size) tuples.
+    Returns:
+        Tuple of (full_text, char_map, page_sizes).
+    """
+    full_text = "".join(page_text for page_text, _, _ in pages)
+    if pages:
+        char_map = {k: np.concatenate([page_chars[k] for _, page_chars, _ in pages]) for k in CHAR_COLUMNS}
+    else:
+        char_map = _to_columns(0, [], 0.0)
+    page_sizes = np.array([page_size for _, _, page_size in pages], dtype=np.float32).reshape(-1, 2)
+    return full_text, char_map, page_sizes
+
+def extract_text_with_coordinates(source):
+    """
+    Extracts text and character coordinates from a PDF using PyMuPDF's rawdict.
+    Args:
+        source: Path to the PDF file (preferred: opened from disk without an extra copy),
+            or its contents as bytes.
     Features:
     - Uses `rawdict` for exact character bounding boxes.
     - Filters tables, headers/footers, and images.
     - Enforces double newlines for block separation.
     Returns:
         full_text (str): The complete text of the PDF.
-        char_map (list): List of {page, x, y, width, height} for each char.
-    """
-    doc = fitz.open(stream=data, filetype="pdf")
-    full_text = ""
-    char_map = []
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        page_height = page.rect.height
-        page_width = page.rect.width
-        table_bboxes = _get_table_bboxes(page)
-        image_bboxes = _get_image_bboxes(page)
-        header_height = page_height * 0.05
-        footer_y = page_height * 0.95
-        text_page = page.get_text("rawdict", flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
-        blocks = text_page.get("blocks", [])
-        text_blocks = [b for b in blocks if b.get("type") == 0]
-        sorted_blocks = sorted(text_blocks, key=lambda b: (b["bbox"][1] // 10, b["bbox"][0]))
-        for block in sorted_blocks:
-            bbox = fitz.Rect(block["bbox"])
-            if _is_block_filtered(bbox, header_height, footer_y, table_bboxes, image_bboxes):
-                continue
-            block_text, block_chars = _process_block(block, page_num, page_height, page_width)
-            full_text, char_map = _finalize_block(block_text, block_chars, full_text, char_map)
-    doc.close()
-    return full_text, char_map
+        char_map (dict): CHAR_COLUMNS -> NumPy array, one entry per char of full_text
+            (page is 1-based, y is measured from the page bottom).
+        page_sizes (np.ndarray): (n_pages, 2) array of (width, height), indexed by page - 1.
+    """
+    with _open_document(source) as doc:
+        pages = [_process_page(page, page_num) for page_num, page in enumerate(doc)]
+    return _merge_pages(pages)
+
+async def extract_text_with_coordinates_parallel(source, executor):
+    """
+    Same as extract_text_with_coordinates, but parses pages concurrently in the given executor.
+    Pages are independent, so a process pool scales close to linearly with core count
+    and the event loop stays free while the document is parsed.
+    Args:
+        source: Path to the PDF file, or its contents as bytes. Prefer a path: bytes are
+            pickled to the executor once per page.
+        executor: concurrent.futures executor (normally a ProcessPoolExecutor).
+    Returns:
+        Tuple of (full_text, char_map, page_sizes).
+    """
+    loop = asyncio.get_running_loop()
+    with _open_document(source) as doc:
+        page_count = len(doc)
+    pages = await asyncio.gather(*(
+        loop.run_in_executor(executor, _extract_page, source, page_num)
+        for page_num in range(page_count)
+    ))
+    return _merge_pages(pages)
@@ -4,48 +4,124 @@
 PDFService: High-level business logic for PDF upload, extraction, and RAG indexing.
 
 This service handles:
-- Saving uploaded PDF files
+- Streaming uploaded PDF files to disk
 - Extracting text and character coordinates
 - Splitting text into sentences
 - Mapping sentences to bounding boxes
-- Triggering background RAG indexing
+- Caching extraction results by file hash
+- Queueing RAG indexing jobs (run by the arq worker in worker.py)
 
 Dependencies:
 - fastapi.HTTPException for error handling
-- httpx for async HTTP requests
+- arq (Redis) job queue for RAG indexing
 - pdf_parser and nlp modules for PDF/text processing
 """
 
 import os
+import time
 import uuid
+import asyncio
 import hashlib
-import httpx
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import aiofiles
 import logging
+import msgpack
+import numpy as np
 from fastapi import HTTPException
-from .pdf_parser import extract_text_with_coordinates
+from .pdf_parser import extract_text_with_coordinates_parallel
 from .nlp import split_into_sentences
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Bump whenever extraction, sentence splitting or bbox output changes so stale cache entries are ignored.
+CACHE_VERSION = 4
+# Size cap for the extraction cache; least recently used entries are removed beyond it.
+CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "512")) * (1 << 20)
+
+# Every code point for which str.isspace() is true (none exist above U+3000).
+_WHITESPACE_CODEPOINTS = np.array([c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32)
+
+
+def _nonspace_positions(text):
+    """
+    Return the indices of all non-whitespace characters in text.
+
+    The scan runs in NumPy over the UTF-32 code points instead of calling
+    str.isspace() per character in Python.
+
+    Args:
+        text (str): The text to scan.
+    Returns:
+        np.ndarray: int64 indices into text, in ascending order.
+    """
+    codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    return np.flatnonzero(~np.isin(codepoints, _WHITESPACE_CODEPOINTS))
+
 
 class PDFService:
     """
     Service class for handling PDF uploads, extraction, and RAG indexing.
     """
-    def __init__(self, static_dir="/static", rag_service_url=None):
+    def __init__(self, static_dir="/static", max_workers=None, cache_dir="/data/cache"):
         """
         Initialize the PDFService.
 
         Args:
             static_dir (str): Directory to save uploaded PDFs.
-            rag_service_url (str): URL for the RAG service. If not provided, uses RAG_SERVICE_URL env var.
-        Raises:
-            RuntimeError: If RAG_SERVICE_URL is not set.
+            max_workers (int): Size of the process pool used for PDF parsing and sentence splitting.
+                Defaults to the CPU count.
+            cache_dir (str): Directory for cached extraction results, keyed by file hash.
+                Bounded by CACHE_MAX_BYTES; entries from older CACHE_VERSIONs are removed on the next write.
         """
         self.static_dir = static_dir
-        self.rag_service_url = rag_service_url or os.getenv("RAG_SERVICE_URL")
-        if not self.rag_service_url:
-            logging.error("RAG_SERVICE_URL is not set. Please set the environment variable or pass it explicitly.")
-            raise RuntimeError("RAG_SERVICE_URL is not set. Please set the environment variable or pass it explicitly.")
+        self.cache_dir = cache_dir
         os.makedirs(self.static_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Shared across requests for PDF parsing and sentence splitting. Spawned rather than
+        # forked so workers don't inherit the parent's torch/TTS threads.
+        self.max_workers = max_workers or os.cpu_count()
+        self.cpu_pool = self._new_cpu_pool()
+        # arq Redis pool, connected in the app lifespan (see main.py)
+        self.job_queue = None
+
+    def _new_cpu_pool(self):
+        """Create the process pool used for PDF parsing and sentence splitting."""
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _replace_broken_pool(self, pool):
+        """Replace pool with a fresh one, unless a concurrent request already did."""
+        if self.cpu_pool is pool:
+            logging.warning("PDF worker process died; recreating the process pool")
+            self.cpu_pool = self._new_cpu_pool()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _extract(self, pdf_path):
+        """
+        Extract text, char_map and page sizes from the PDF and split the text into sentences,
+        on the process pool.
+        A worker process that dies (e.g. MuPDF crashing on a malformed PDF, or an OOM kill) breaks
+        the whole pool, so it is replaced and the extraction retried once on the new pool:
+        uploads that only shared the broken pool succeed, the one that crashes it again fails.
+        Returns:
+            tuple: (text, char_map, page_sizes, sentences)
+        Raises:
+            HTTPException: If a worker process dies on both attempts.
+        """
+        for attempt in range(2):
+            pool = self.cpu_pool
+            try:
+                text, char_map, page_sizes = await extract_text_with_coordinates_parallel(pdf_path, pool)
+                # spaCy holds the GIL, so split on the process pool to keep the event loop free
+                loop = asyncio.get_running_loop()
+                sentences = await loop.run_in_executor(pool, split_into_sentences, text)
+                return text, char_map, page_sizes, sentences
+            except BrokenProcessPool:
+                self._replace_broken_pool(pool)
+        raise HTTPException(status_code=422, detail="The PDF could not be processed.")
 
     async def process_upload(self, file, embedding_model, background_tasks):
         """
@@ -54,11 +130,11 @@ class PDFService:
         Args:
             file (UploadFile): The uploaded PDF file.
             embedding_model (str): The embedding model to use for RAG.
-            background_tasks (BackgroundTasks): FastAPI background tasks for async RAG call.
+            background_tasks (BackgroundTasks): FastAPI background tasks for writing the extraction cache.
         Returns:
             dict: Contains sentences with bounding boxes, PDF URL, and file hash.
         Raises:
-            HTTPException: If file is not a PDF or embedding_model is missing.
+            HTTPException: If file is not a PDF, embedding_model is missing, or the PDF cannot be processed.
         """
         if not file.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Please upload a PDF file.")
@@ -69,20 +145,25 @@ class PDFService:
         pdf_filename = f"{upload_id}.pdf"
         pdf_path = os.path.join(self.static_dir, pdf_filename)
 
-        content = await file.read()
-        file_hash = hashlib.md5(content).hexdigest()
+        # Stream to disk and hash incrementally so the whole PDF is never held in memory
+        hasher = hashlib.blake2b(digest_size=16)
+        async with aiofiles.open(pdf_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+                await f.write(chunk)
+        file_hash = hasher.hexdigest()
 
-        with open(pdf_path, "wb") as f:
-            f.write(content)
+        cache_path = self._cache_path(file_hash)
+        cached = await self._load_cache(cache_path)
+        if cached:
+            text, enriched_sentences, pages = cached["text"], cached["sentences"], cached["pages"]
+        else:
+            text, char_map, page_sizes, sentences = await self._extract(pdf_path)
+            enriched_sentences = self._map_sentences_to_bboxes(sentences, text, char_map)
+            pages = self._page_dicts(page_sizes)
+            background_tasks.add_task(self._write_cache, cache_path, text, enriched_sentences, pages)
 
-        text, char_map = extract_text_with_coordinates(content)
-        sentences = split_into_sentences(text)
-
-        enriched_sentences = self._map_sentences_to_bboxes(sentences, text, char_map)
-
-        # Trigger RAG Indexing in background
-        background_tasks.add_task(
-            self._call_rag,
+        await self._enqueue_rag_index(
             text,
             {"filename": file.filename, "upload_id": upload_id, "file_hash": file_hash},
             embedding_model
@@ -90,10 +171,89 @@ class PDFService:
 
         return {
             "sentences": enriched_sentences,
+            "pages": pages,
             "pdfUrl": f"/{pdf_filename}",
             "fileHash": file_hash
         }
 
+    def _cache_path(self, file_hash):
+        """Return the cache file path for a PDF with the given hash."""
+        return os.path.join(self.cache_dir, f"{file_hash}.v{CACHE_VERSION}.msgpack")
+
+    @staticmethod
+    async def _load_cache(cache_path):
+        """
+        Load cached extraction results.
+
+        Args:
+            cache_path (str): Path returned by _cache_path.
+        Returns:
+            dict | None: {"text", "sentences", "pages"} on a cache hit, None on a miss or unreadable entry.
+        """
+        try:
+            async with aiofiles.open(cache_path, "rb") as f:
+                data = msgpack.unpackb(await f.read(), raw=False)
+            os.utime(cache_path)  # mark as recently used for _prune_cache
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("Ignoring unreadable cache entry %s: %r", cache_path, e)
+            return None
+
+    def _write_cache(self, cache_path, text, enriched_sentences, pages):
+        """
+        Persist extraction results for later uploads of the same file, then prune the cache.
+        Writes to a temporary file first so readers never see a partial entry.
+
+        Args:
+            cache_path (str): Path returned by _cache_path.
+            text (str): The full extracted text from the PDF.
+            enriched_sentences (list): Sentences with bounding boxes.
+            pages (list): Page sizes from _page_dicts.
+        """
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(msgpack.packb({"text": text, "sentences": enriched_sentences, "pages": pages}, use_bin_type=True))
+        os.replace(tmp_path, cache_path)
+        self._prune_cache()
+
+    def _prune_cache(self):
+        """
+        Keep the extraction cache under CACHE_MAX_BYTES.
+        Entries written by other cache versions, and temporary files left by interrupted writes,
+        are always removed; current entries are removed least recently used first (by mtime,
+        which _load_cache refreshes on every hit).
+        """
+        current_suffix = f".v{CACHE_VERSION}.msgpack"
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                try:
+                    if entry.name.endswith(".tmp"):
+                        # Only stale ones; a recent .tmp may be a write in progress
+                        if entry.stat().st_mtime < time.time() - 3600:
+                            os.remove(entry.path)
+                        continue
+                    if not entry.name.endswith(".msgpack"):
+                        continue
+                    if not entry.name.endswith(current_suffix):
+                        os.remove(entry.path)
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # removed concurrently
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
     @staticmethod
     def _map_sentences_to_bboxes(sentences, text, char_map):
         """
@@ -102,71 +262,72 @@ class PDFService:
         Args:
             sentences (list): List of sentence dicts with 'text' key.
             text (str): The full extracted text from the PDF.
-            char_map (list): List of character coordinate dicts.
+            char_map (dict): Character coordinate columns from extract_text_with_coordinates.
         Returns:
             list: Sentences with 'bboxes' key added for each.
         """
-        current_idx = 0
+        # Sentences come out of split_into_sentences in document order, so a
+        # single forward cursor over the whitespace-free text is enough.
+        nonspace_positions = _nonspace_positions(text)
+        text_compact = "".join(text.split())
+        compact_ptr = 0
         enriched_sentences = []
         for s in sentences:
-            s_text = s["text"]
-            s_text_clean = "".join(s_text.split())
-            if not s_text_clean:
+            s_text_clean = "".join(s["text"].split())
+            start = text_compact.find(s_text_clean, compact_ptr) if s_text_clean else -1
+            if start == -1:
                 s["bboxes"] = []
-                enriched_sentences.append(s)
-                continue
-            match_start = -1
-            match_end = -1
-            s_ptr = 0
-            temp_idx = current_idx
-            while temp_idx < len(text) and s_ptr < len(s_text_clean):
-                char = text[temp_idx]
-                if char.isspace():
-                    temp_idx += 1
-                    continue
-                if char == s_text_clean[s_ptr]:
-                    if match_start == -1:
-                        match_start = temp_idx
-                    s_ptr += 1
-                    temp_idx += 1
-                else:
-                    if match_start != -1:
-                        temp_idx = match_start + 1
-                        match_start = -1
-                        s_ptr = 0
-                    else:
-                        temp_idx += 1
-            if match_start != -1 and s_ptr == len(s_text_clean):
-                match_end = temp_idx
-                bboxes = char_map[match_start:match_end]
-                s["bboxes"] = bboxes
-                current_idx = match_end
             else:
-                s["bboxes"] = []
+                end = start + len(s_text_clean)
+                match_start = int(nonspace_positions[start])
+                match_end = int(nonspace_positions[end - 1]) + 1
+                chars = {k: v[match_start:match_end] for k, v in char_map.items()}
+                s["bboxes"] = PDFService._bboxes_to_dicts(chars)
+                compact_ptr = end
             enriched_sentences.append(s)
         return enriched_sentences
 
-    async def _call_rag(self, txt: str, metadata: dict, emb_model: str):
+    @staticmethod
+    def _bboxes_to_dicts(chars):
         """
-        Asynchronously call the RAG service to index the extracted text.
+        Convert a slice of char_map columns into the per-character bbox dicts sent to the frontend.
+        Page dimensions are not repeated per character; they are sent once in the `pages` list.
+
+        Args:
+            chars (dict): Character coordinate columns for one sentence.
+        Returns:
+            list: One {page, x, y, width, height} dict per character.
+        """
+        keys = ("page", "x", "y", "width", "height")
+        columns = [chars[k].tolist() for k in keys]
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    @staticmethod
+    def _page_dicts(page_sizes):
+        """
+        Convert page sizes into the per-page dicts sent to the frontend.
+
+        Args:
+            page_sizes (np.ndarray): (n_pages, 2) array of page (width, height).
+        Returns:
+            list: One {page, width, height} dict per page, in page order (page is 1-based).
+        """
+        return [
+            {"page": page, "width": width, "height": height}
+            for page, (width, height) in enumerate(page_sizes.tolist(), start=1)
+        ]
+
+    async def _enqueue_rag_index(self, txt: str, metadata: dict, emb_model: str):
+        """
+        Queue a RAG indexing job for the arq worker.
+        A queueing failure is logged but does not fail the upload.
 
         Args:
             txt (str): The extracted text to index.
             metadata (dict): Metadata about the PDF/file.
             emb_model (str): The embedding model to use.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                await client.post(
-                    f"{self.rag_service_url}/index",
-                    json={
-                        "text": txt,
-                        "embedding_model": emb_model,
-                        "metadata": metadata
-                    },
-                    timeout=300.0
-                )
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                print(f"RAG Indexing failed: {repr(e)}", flush=True)
+        try:
+            await self.job_queue.enqueue_job("rag_index", txt, metadata, emb_model)
+        except Exception:
+            logging.exception("Failed to queue RAG indexing for %s", metadata.get("filename"))
@@ -5,74 +5,270 @@ Provides voice synthesis and voice style management utilities.
 """
 
 import os
-import glob
-import tempfile
+import asyncio
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import soundfile as sf
 import torch
 from kokoro import KPipeline
 
+logger = logging.getLogger(__name__)
 
 # Initialize the Kokoro pipeline once at module level
 _pipeline = KPipeline(lang_code='a')
 VOICES_DIR = "/models/kokoro/voices"
+_VOICE_PATH_CACHE_SIZE = 128
+
+# Optional CPU inference tuning:
+# - KOKORO_NUM_THREADS: intra-op thread count for torch (default: half the CPUs, leaving room
+#   for the event loop and the PDF parsing pool)
+# - KOKORO_QUANTIZE=int8: dynamically quantize Linear weights of the text/prosody layers to int8 (default: fp32)
+# - KOKORO_COMPILE=1: compile the acoustic model with torch.compile (slower first call)
+torch.set_num_threads(int(os.getenv("KOKORO_NUM_THREADS", max(1, (os.cpu_count() or 1) // 2))))
+_COMPILE = os.getenv("KOKORO_COMPILE", "0") == "1"
+
+# Threads that run synthesis off the event loop. Kept small because each synthesis already
+# uses torch's intra-op threads; this is also the number of sentences synthesized at once.
+# A torch.compile'd model must not be called from several threads (dynamo is not thread-safe),
+# so compiled inference runs on a single thread.
+TTS_WORKERS = 1 if _COMPILE else 2
+_TTS_POOL = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+# KPipeline keeps per-call state in its text frontend (G2P), so it is not shared between threads:
+# the first synthesis thread takes over the module-level pipeline, and every other thread gets its
+# own, built without a model, that reuses the one acoustic model loaded above. Eager torch
+# inference on that model is safe to run from several threads at once.
+_thread_state = threading.local()
+_unclaimed_pipelines = [_pipeline]
+
+
+# Submodules that are quantized with KOKORO_QUANTIZE=int8. The decoder (vocoder) stays fp32,
+# since its output is the waveform itself and is the most sensitive to weight precision.
+_QUANTIZED_SUBMODULES = ("bert", "bert_encoder", "predictor", "text_encoder")
+
+
+def _quantize_model(pipeline: KPipeline) -> None:
+    """
+    Dynamically quantize the Linear layers of the pipeline's text and prosody submodules to int8.
+    LSTMs stay fp32: Kokoro calls flatten_parameters() on them, which quantized LSTMs do not have.
+    """
+    model = pipeline.model.eval()
+    for name in _QUANTIZED_SUBMODULES:
+        submodule = getattr(model, name, None)
+        if submodule is not None:
+            setattr(model, name, torch.ao.quantization.quantize_dynamic(submodule, {torch.nn.Linear}, dtype=torch.qint8))
+
+
+def _compile_model(pipeline: KPipeline) -> None:
+    """Replace the pipeline's model with a torch.compile'd version, keeping eager mode on failure."""
+    try:
+        # Compilation happens lazily on the first call; fall back to eager there too instead of raising
+        import torch._dynamo
+        torch._dynamo.config.suppress_errors = True
+        pipeline.model = torch.compile(pipeline.model.eval(), dynamic=True)
+    except Exception as e:
+        logger.warning("torch.compile unavailable for Kokoro, using eager mode: %r", e)
+
+
+if getattr(_pipeline, "model", None) is not None:
+    if os.getenv("KOKORO_QUANTIZE", "fp32") == "int8":
+        _quantize_model(_pipeline)
+    if _COMPILE:
+        _compile_model(_pipeline)
+
+
+def _thread_pipeline() -> KPipeline:
+    """
+    Return the calling thread's KPipeline: the module-level one for the first thread, otherwise
+    one created on first use with the shared model.
+    """
+    pipeline = getattr(_thread_state, "pipeline", None)
+    if pipeline is None:
+        try:
+            pipeline = _unclaimed_pipelines.pop()  # atomic, so only one thread gets it
+        except IndexError:
+            pipeline = KPipeline(lang_code='a', model=False)
+            pipeline.model = _pipeline.model
+        _thread_state.pipeline = pipeline
+    return pipeline
+
 
 class KokoroTTS:
     """
     KokoroTTS provides text-to-speech synthesis using the Kokoro pipeline.
     """
     def __init__(self):
-        """Initialize the TTS pipeline and set up voice directory and sample rate."""
-        self.pipeline = _pipeline
+        """Set up the voice directory, sample rate and preloaded voices."""
         self.voices_dir = VOICES_DIR
         self.sample_rate = 24000  # Kokoro standard sample rate
+        self._voices = tuple(self._scan_voices())
+        self._voice_cache = self._load_voices()
+        self._voice_paths: dict[str, str] = {}
 
-    def get_available_voices(self) -> list[str]:
-        """Return a sorted list of available voice names (without .pt extension)."""
-        if not os.path.exists(self.voices_dir):
+    @property
+    def pipeline(self) -> KPipeline:
+        """The Kokoro pipeline of the calling thread (see _thread_pipeline)."""
+        return _thread_pipeline()
+
+    def _scan_voices(self) -> list[str]:
+        """Scan the voices directory and return sorted voice names (without .pt extension)."""
+        try:
+            with os.scandir(self.voices_dir) as it:
+                return sorted(e.name[:-3] for e in it if e.name.endswith(".pt") and e.is_file())
+        except FileNotFoundError:
             return []
-        pt_files = glob.glob(os.path.join(self.voices_dir, "*.pt"))
-        return sorted([os.path.basename(f).replace(".pt", "") for f in pt_files])
+
+    def _load_voices(self) -> dict[str, torch.Tensor]:
+        """Load every available voice tensor once, keyed by voice name."""
+        return {
+            name: torch.load(os.path.join(self.voices_dir, f"{name}.pt"), map_location="cpu", weights_only=True)
+            for name in self._voices
+        }
+
+    def get_available_voices(self) -> list[str]:
+        """Return a sorted list of available voice names, as scanned at startup."""
+        return list(self._voices)
+
+    def resolve_voice_path(self, voice: str) -> str:
+        """
+        Return the .pt path for a voice, falling back to the first available voice.
+        Results are cached per voice name on this instance.
+        """
+        path = self._voice_paths.get(voice)
+        if path is None:
+            if len(self._voice_paths) >= _VOICE_PATH_CACHE_SIZE:
+                self._voice_paths.clear()  # names come from requests; keep the cache bounded
+            path = self._voice_paths[voice] = self._find_voice_path(voice)
+        return path
+
+    def _find_voice_path(self, voice: str) -> str:
+        """Look up the .pt path for a voice (or the fallback voice) among the scanned voices."""
+        if voice in self._voices:
+            return os.path.join(self.voices_dir, f"{voice}.pt")
+        voice_path = os.path.join(self.voices_dir, f"{voice}.pt")
+        if self._voices:
+            logger.warning("Voice %s not found at %s, falling back to %s", voice, voice_path, self._voices[0])
+            return os.path.join(self.voices_dir, f"{self._voices[0]}.pt")
+        raise FileNotFoundError(f"No voices found in {self.voices_dir} and voice '{voice}' is not a valid built-in voice.")
+
+    def load_voice(self, voice: str) -> torch.Tensor | str:
+        """Return the preloaded tensor for a voice (or its fallback), or its path if it is not preloaded."""
+        voice_path = self.resolve_voice_path(voice)
+        name = os.path.splitext(os.path.basename(voice_path))[0]
+        return self._voice_cache.get(name, voice_path)
 
     def synthesize(self, text: str, voice: str, speed: float = 1.0) -> tuple[torch.Tensor, int]:
         """
         Synthesize speech from text using the specified voice and speed.
         Returns a tuple of (audio tensor, sample rate).
         """
-        voice_path = os.path.join(self.voices_dir, f"{voice}.pt")
-        if not os.path.exists(voice_path):
-            available = self.get_available_voices()
-            if available:
-                print(f"Voice {voice} not found at {voice_path}, falling back to {available[0]}")
-                voice_path = os.path.join(self.voices_dir, f"{available[0]}.pt")
-            else:
-                raise FileNotFoundError(f"No voices found in {self.voices_dir} and voice '{voice}' is not a valid built-in voice.")
+        voice_pack = self.load_voice(voice)
 
         # KPipeline returns a generator of (graphemes, phonemes, audio)
-        generator = self.pipeline(text, voice=voice_path, speed=speed)
+        generator = self.pipeline(text, voice=voice_pack, speed=speed)
         all_audio = [audio for _, _, audio in generator if audio is not None]
-        if not all_audio:
-            return torch.zeros(0), self.sample_rate
-        full_audio = torch.cat(all_audio) if len(all_audio) > 1 else all_audio[0]
-        return full_audio, self.sample_rate
+        return _concat_audio(all_audio), self.sample_rate
+
+    def synthesize_many(self, texts: list[str], voice: str, speed: float = 1.0) -> list[torch.Tensor]:
+        """
+        Synthesize several texts in one pipeline run.
+        KPipeline accepts a list of texts and tags every audio chunk with the index of the text it
+        came from (kokoro>=0.9.4), so chunks are grouped back per text.
+        Returns one audio tensor per text, in order.
+        """
+        voice_pack = self.load_voice(voice)
+        chunks = [[] for _ in texts]
+        for result in self.pipeline(list(texts), voice=voice_pack, speed=speed):
+            if result.audio is not None:
+                chunks[result.text_index].append(result.audio)
+        return [_concat_audio(c) for c in chunks]
+
+    def synthesize_stream(self, text: str, voice: str, speed: float = 1.0):
+        """
+        Synthesize speech chunk by chunk, as Kokoro produces it.
+        Yields 1-D float32 numpy arrays at self.sample_rate.
+        """
+        voice_pack = self.load_voice(voice)
+        for _, _, audio in self.pipeline(text, voice=voice_pack, speed=speed):
+            if audio is not None:
+                yield audio.numpy() if torch.is_tensor(audio) else audio
 
     def synthesize_to_file(self, text: str, out_path: str, voice: str, speed: float = 1.0) -> str:
         """
         Synthesize speech and write the result to a WAV file.
+        Each chunk is written as soon as it is generated, so the full waveform is never held in memory.
         Returns the output file path.
         """
-        audio, sr = self.synthesize(text, voice, speed)
-        audio_np = audio.numpy() if torch.is_tensor(audio) else audio
-        sf.write(out_path, audio_np, sr)
-        return out_path
-        sf.write(out_path, audio_np, sr)
+        with WavSession(out_path, self.sample_rate) as wav:
+            for audio in self.synthesize_stream(text, voice, speed):
+                wav.write(audio)
         return out_path
 
 
+class WavSession:
+    """
+    A mono 16-bit WAV file kept open for a whole synthesis and written chunk by chunk.
+    Float chunks are converted to int16 in buffers that are reused across writes, instead of
+    letting libsndfile allocate a conversion buffer on every write.
+    """
+    def __init__(self, path: str, sample_rate: int):
+        """Open `path` for writing at the given sample rate."""
+        self._file = sf.SoundFile(path, "w", samplerate=sample_rate, channels=1, subtype="PCM_16", format="WAV")
+        self._scratch = np.empty(0, dtype=np.float32)
+        self._pcm = np.empty(0, dtype=np.int16)
+
+    def write(self, audio: np.ndarray) -> None:
+        """Append a chunk of float audio in [-1, 1]; out-of-range samples are clipped."""
+        n = audio.shape[0]
+        if self._pcm.shape[0] < n:
+            self._scratch = np.empty(n, dtype=np.float32)
+            self._pcm = np.empty(n, dtype=np.int16)
+        scratch = self._scratch[:n]
+        np.multiply(audio, 32767.0, out=scratch, casting="unsafe")
+        np.clip(scratch, -32768.0, 32767.0, out=scratch)
+        np.rint(scratch, out=scratch)
+        pcm = self._pcm[:n]
+        np.copyto(pcm, scratch, casting="unsafe")
+        self._file.write(pcm)
+
+    def close(self) -> None:
+        """Finalize the WAV header and close the file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _concat_audio(chunks: list[torch.Tensor]) -> torch.Tensor:
+    """
+    Join audio chunks into one 1-D tensor.
+    The output is allocated once at its final size and each chunk is copied into its slice,
+    avoiding the intermediate allocations of repeated concatenation.
+    """
+    if not chunks:
+        return torch.zeros(0)
+    if len(chunks) == 1:
+        return chunks[0]
+    lens = [a.shape[0] for a in chunks]
+    out = torch.empty(sum(lens), dtype=chunks[0].dtype)
+    off = 0
+    for a, n in zip(chunks, lens):
+        out[off:off + n].copy_(a)
+        off += n
+    return out
+
+
 # Module-level TTS instance
 _tts = KokoroTTS()
 _available_voices = _tts.get_available_voices()
-print(f"Kokoro discovered voices: {_available_voices}")
+logger.info("Kokoro discovered voices: %s", _available_voices)
 
 
 def tts_sentence_to_wav(
@@ -86,19 +282,104 @@ def tts_sentence_to_wav(
     Returns the path to the generated WAV file.
     """
     os.makedirs(out_dir, exist_ok=True)
-    fd, tmp = tempfile.mkstemp(suffix=".wav", dir=out_dir)
-    os.close(fd)
+    tmp = os.path.join(out_dir, f"{uuid.uuid4().hex}.wav")
 
-    # Handle None or empty voice_style
-    available = _tts.get_available_voices()
-    if not voice_style or (voice_style and voice_style.endswith(".json")):
-        if not available:
-            raise ValueError("No voices available and no voice_style provided.")
-        voice_style = available[0]
+    voice_style = _default_voice(voice_style)
 
     return _tts.synthesize_to_file(sentence_text, tmp, voice_style, speed)
 
 
+async def tts_sentence_to_wav_async(
+    sentence_text: str,
+    out_dir: str,
+    voice_style: str = None,
+    speed: float = 1.0
+) -> str:
+    """
+    Run tts_sentence_to_wav on the TTS thread pool so synthesis does not block the event loop.
+    Returns the path to the generated WAV file.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_TTS_POOL, tts_sentence_to_wav, sentence_text, out_dir, voice_style, speed)
+
+
+async def tts_sentences_to_wavs_async(
+    sentences: list[str],
+    out_dir: str,
+    voice_style: str = None,
+    speed: float = 1.0
+) -> list[str]:
+    """
+    Run tts_sentences_to_wavs on the TTS thread pool so synthesis does not block the event loop.
+    Returns the paths to the generated WAV files, in the same order as the sentences.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_TTS_POOL, tts_sentences_to_wavs, sentences, out_dir, voice_style, speed)
+
+
+def tts_sentences_to_wavs(
+    sentences: list[str],
+    out_dir: str,
+    voice_style: str = None,
+    speed: float = 1.0
+) -> list[str]:
+    """
+    Synthesize several sentences in one batched pipeline run, one WAV file per sentence.
+    Returns the paths to the generated WAV files, in the same order as the sentences.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    voice_style = _default_voice(voice_style)
+
+    paths = []
+    for audio in _tts.synthesize_many(sentences, voice_style, speed):
+        tmp = os.path.join(out_dir, f"{uuid.uuid4().hex}.wav")
+        with WavSession(tmp, _tts.sample_rate) as wav:
+            wav.write(audio.numpy())
+        paths.append(tmp)
+    return paths
+
+
+async def tts_sentences_parallel(
+    sentences: list[str],
+    out_dir: str,
+    voice_style: str = None,
+    speed: float = 1.0,
+    concurrency: int = TTS_WORKERS
+):
+    """
+    Synthesize sentences concurrently, each to its own WAV file, on worker threads.
+    At most `concurrency` sentences are synthesized at once (by default one per worker thread, more
+    would only queue on the pool). Paths are yielded in sentence order,
+    so sentence N+1 is already being synthesized while the caller handles sentence N.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    voice_style = _default_voice(voice_style)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def synthesize_one(text: str) -> str:
+        async with semaphore:
+            tmp = os.path.join(out_dir, f"{uuid.uuid4().hex}.wav")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_TTS_POOL, _tts.synthesize_to_file, text, tmp, voice_style, speed)
+
+    tasks = [asyncio.create_task(synthesize_one(text)) for text in sentences]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _default_voice(voice_style: str = None) -> str:
+    """Return voice_style, or the first available voice if it is None, empty or a legacy .json style."""
+    if not voice_style or (voice_style and voice_style.endswith(".json")):
+        if not _available_voices:
+            raise ValueError("No voices available and no voice_style provided.")
+        return _available_voices[0]
+    return voice_style
+
+
 def list_voice_styles() -> list[str]:
     """Return a list of available voice styles."""
     return _tts.get_available_voices()
@@ -0,0 +1,80 @@
+"""
+worker.py
+---------
+arq worker that runs RAG indexing jobs queued by the upload endpoint.
+
+Indexing runs in this separate process, so it survives API restarts and does not hold
+sockets open on the HTTP workers. Start it with:
+
+    arq app.worker.WorkerSettings
+
+Environment Variables:
+- RAG_SERVICE_URL: URL for the RAG service (default: http://rag-service:8000)
+- REDIS_URL: Redis used as the job queue (default: redis://redis:6379)
+"""
+import os
+import logging
+
+import httpx
+from arq import Retry
+from arq.connections import RedisSettings
+
+RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://rag-service:8000")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+logger = logging.getLogger(__name__)
+
+
+async def startup(ctx):
+    """Create the RAG service client shared by all jobs of this worker."""
+    ctx["http"] = httpx.AsyncClient(
+        base_url=RAG_SERVICE_URL,
+        timeout=httpx.Timeout(300.0, connect=5.0),
+    )
+
+
+async def shutdown(ctx):
+    """Close the RAG service client."""
+    await ctx["http"].aclose()
+
+
+async def rag_index(ctx, txt: str, metadata: dict, emb_model: str):
+    """
+    Ask the RAG service to index the extracted text of a PDF.
+
+    Args:
+        ctx (dict): arq job context.
+        txt (str): The extracted text to index.
+        metadata (dict): Metadata about the PDF/file.
+        emb_model (str): The embedding model to use.
+    Returns:
+        dict: Result reported by the RAG service.
+    Raises:
+        Retry: On connection errors or 5xx responses, with a growing delay.
+    """
+    try:
+        resp = await ctx["http"].post(
+            "/index",
+            json={
+                "text": txt,
+                "embedding_model": emb_model,
+                "metadata": metadata
+            },
+        )
+        resp.raise_for_status()
+    except (httpx.TransportError, httpx.HTTPStatusError) as e:
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+            raise
+        logger.warning("RAG indexing attempt %s failed: %r", ctx["job_try"], e)
+        raise Retry(defer=ctx["job_try"] * 10)
+    return resp.json()
+
+
+class WorkerSettings:
+    """arq worker configuration."""
+    functions = [rag_index]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(REDIS_URL)
+    max_tries = 5
+    job_timeout = 600
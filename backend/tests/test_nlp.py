@@ -0,0 +1,50 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from app.nlp import _fast_split, get_nlp, split_into_sentences
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    """The spaCy pipeline the fast path stands in for (a blank English sentencizer if the model is missing)."""
+    try:
+        return get_nlp()
+    except OSError:
+        blank = spacy.blank("en")
+        blank.add_pipe("sentencizer")
+        return blank
+
+
+TYPESET_CHUNKS = [
+    "She said “Stop.” Then he left.",
+    "It was ‘over.’ Then the lights came on.",
+    "He shouted “Run!” Nobody moved.",
+    "Was it “true?” Nobody knew.",
+    "Il a dit «Non.» Then it ended.",
+    "The (final) result held. Good, she said.",
+    "Plain ASCII \"quotes.\" Still split. Brackets (too.) Fine.",
+]
+
+# Sentences opening with a quote or bracket: the fast path defers to spaCy for these
+OPENER_CHUNKS = [
+    "The result held. “Good,” she said.",
+    "It ended. (Mostly.) Then it began.",
+]
+
+
+@pytest.mark.parametrize("chunk", TYPESET_CHUNKS)
+def test_fast_split_matches_spacy_on_quoted_sentence_ends(nlp, chunk):
+    fast = _fast_split(chunk)
+    assert fast is not None
+    assert [part.strip() for part in fast] == [sent.text.strip() for sent in nlp(chunk).sents]
+
+
+@pytest.mark.parametrize("chunk", OPENER_CHUNKS)
+def test_fast_split_defers_sentences_opening_with_quotes(chunk):
+    assert _fast_split(chunk) is None
+
+
+def test_closing_curly_quote_stays_with_its_sentence():
+    sentences = split_into_sentences("She said “Stop.” Then he left.")
+    assert [s["text"] for s in sentences] == ["She said “Stop.”", "Then he left."]
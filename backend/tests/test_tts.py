@@ -0,0 +1,40 @@
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("kokoro")
+pytest.importorskip("soundfile")
+
+from kokoro import KPipeline
+
+try:
+    from app import tts  # builds the Kokoro pipeline, downloading the model if it is not cached
+except Exception as e:
+    pytest.skip(f"Kokoro model unavailable: {e!r}", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def quantized_model():
+    if getattr(tts._pipeline, "model", None) is None:
+        pytest.skip("Kokoro model not loaded")
+    pipeline = SimpleNamespace(model=copy.deepcopy(tts._pipeline.model))
+    tts._quantize_model(pipeline)
+    return pipeline.model
+
+
+def test_quantization_keeps_lstms_float(quantized_model):
+    modules = list(quantized_model.modules())
+    assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in modules)
+    assert not any(isinstance(m, torch.ao.nn.quantized.dynamic.LSTM) for m in modules)
+
+
+def test_quantized_model_synthesizes(quantized_model):
+    if not tts.list_voice_styles():
+        pytest.skip("no Kokoro voices installed")
+    pipeline = KPipeline(lang_code='a', model=False)
+    pipeline.model = quantized_model
+    voice = tts._tts.load_voice(tts._default_voice())
+    audio = [a for _, _, a in pipeline("Hello world.", voice=voice) if a is not None]
+    assert audio and audio[0].numel() > 0
@@ -50,6 +50,8 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
     const [messages, setMessages] = useState<Message[]>([]);
     const [input, setInput] = useState('');
     const [loading, setLoading] = useState(false);
+    // True while an answer is streaming in; sentence extraction waits until it completes
+    const [isStreaming, setIsStreaming] = useState(false);
     const [isModelWarming, setIsModelWarming] = useState(false);
     const [indexingStatus, setIndexingStatus] = useState<'checking' | 'indexing' | 'ready' | 'error'>('checking');
     const [collectionName, setCollectionName] = useState<string | null>(null);
@@ -62,8 +64,9 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
     const messagesEndRef = useRef<null | HTMLDivElement>(null);
     const messageRefs = useRef<{ [key: number]: HTMLDivElement | null }>({});
 
-    // Sync chatSentences with parent whenever messages change
+    // Sync chatSentences with parent whenever messages change (once a streamed answer is complete)
     useEffect(() => {
+        if (isStreaming) return;
         let globalId = 0;
         const result: { id: number; text: string; messageIndex: number }[] = [];
         messages.forEach((msg, mIdx) => {
@@ -78,7 +81,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
             });
         });
         setChatSentences(result);
-    }, [messages, setChatSentences]);
+    }, [messages, isStreaming, setChatSentences]);
 
     const activeMessageIndex = useMemo(() => {
         if (activeSource !== 'chat' || currentChatId === null) return null;
@@ -95,7 +98,8 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
     }, [activeMessageIndex, currentChatId]); // Added currentChatId to trigger on every sentence change/jump
 
     const scrollToBottom = () => {
-        messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
+        // Jump instantly while streaming: restarting a smooth scroll every frame makes the view jitter
+        messagesEndRef.current?.scrollIntoView({ behavior: isStreaming ? "auto" : "smooth" });
     };
 
     useEffect(() => {
@@ -198,6 +202,13 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
         setInput('');
         setLoading(true);
         setIsModelWarming(false);
+        let streaming = false;
+        // Pending animation frame that will render the latest streamed answer
+        let frame: number | null = null;
+        const cancelFrame = () => {
+            if (frame !== null) cancelAnimationFrame(frame);
+            frame = null;
+        };
 
         try {
             // First check if models are ready to provide better UI feedback
@@ -232,7 +243,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
                 setIsModelWarming(true);
             }
 
-            const resp = await fetch(`${ragApiUrl}/chat`, {
+            const resp = await fetch(`${ragApiUrl}/chat/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -246,20 +257,64 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
                 })
             });
 
-            if (!resp.ok) {
-                const errorData = await resp.json();
+            if (!resp.ok || !resp.body) {
+                const errorData = await resp.json().catch(() => ({}));
                 throw new Error(errorData.detail || "Failed to get response");
             }
 
-            const data = await resp.json();
-            const botMsg: Message = { role: 'assistant', content: data.answer };
-            setMessages(prev => [...prev, botMsg]);
+            // Show the answer while it streams in: the assistant message is replaced at most once
+            // per animation frame, however many tokens arrived in between
+            streaming = true;
+            setIsStreaming(true);
+            setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
+            const setAnswer = (content: string) =>
+                setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content }]);
+
+            const reader = resp.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let answer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let sep;
+                while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                    const raw = buffer.slice(0, sep);
+                    buffer = buffer.slice(sep + 2);
+                    const event = raw.match(/^event: (.*)$/m)?.[1];
+                    const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+                    if (event === 'token') {
+                        answer += data.content;
+                        if (frame === null) {
+                            frame = requestAnimationFrame(() => {
+                                frame = null;
+                                setAnswer(answer);
+                            });
+                        }
+                    } else if (event === 'done') {
+                        cancelFrame();
+                        answer = data.answer;
+                        setAnswer(answer);
+                    } else if (event === 'error') {
+                        throw new Error(data.detail || "Failed to get response");
+                    }
+                }
+            }
+            // Render whatever is still waiting for a frame before the stream is marked complete
+            if (frame !== null) {
+                cancelFrame();
+                setAnswer(answer);
+            }
         } catch (err: any) {
             console.error(err);
-            setMessages(prev => [...prev, { role: 'assistant', content: `Error: ${err.message || "Failed to get response."}` }]);
+            cancelFrame();
+            const errorMsg: Message = { role: 'assistant', content: `Error: ${err.message || "Failed to get response."}` };
+            setMessages(prev => streaming ? [...prev.slice(0, -1), errorMsg] : [...prev, errorMsg]);
         } finally {
             setLoading(false);
             setIsModelWarming(false);
+            setIsStreaming(false);
         }
     };
 
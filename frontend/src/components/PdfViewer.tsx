@@ -13,8 +13,12 @@ type BBox = {
     y: number;
     width: number;
     height: number;
-    page_height: number;
-    page_width: number;
+};
+
+type PageSize = {
+    page: number;
+    width: number;
+    height: number;
 };
 
 type Sentence = {
@@ -26,6 +30,7 @@ type Sentence = {
 type Props = {
     pdfUrl: string;
     sentences: Sentence[];
+    pages: PageSize[];
     currentId: number | null;
     onJump: (id: number) => void;
     autoScroll: boolean;
@@ -33,7 +38,7 @@ type Props = {
     highlightEnabled?: boolean;
 };
 
-const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, currentId, onJump, autoScroll, isResizing, highlightEnabled = true }: Props) {
+const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, pages, currentId, onJump, autoScroll, isResizing, highlightEnabled = true }: Props) {
     const [numPages, setNumPages] = useState<number | null>(null);
     const [pageWidth, setPageWidth] = useState<number>(600); // Actual width for PDF rendering
     const [scale, setScale] = useState<number>(1); // CSS scale for instant feedback
@@ -99,6 +104,13 @@ const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, currentId,
         return map;
     }, [sentences]);
 
+    // Page dimensions by page number; bboxes only carry their page number
+    const pageSizes = useMemo(() => {
+        const map: { [key: number]: PageSize } = {};
+        (pages || []).forEach(p => { map[p.page] = p; });
+        return map;
+    }, [pages]);
+
     // Auto-scroll to active sentence
     useEffect(() => {
         if (autoScroll && currentId !== null && sentenceRefs.current[currentId]) {
@@ -115,7 +127,8 @@ const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, currentId,
         const pageData = sentencesByPage[pageNumber] || [];
         // ONLY render the highlight for the current active sentence
         const activeSentence = pageData.find(s => s.id === currentId);
-        if (!activeSentence) return null;
+        const size = pageSizes[pageNumber];
+        if (!activeSentence || !size) return null;
 
         return (
             <div
@@ -139,10 +152,10 @@ const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, currentId,
                         }}
                         style={{
                             position: 'absolute',
-                            left: `${(bbox.x / bbox.page_width) * 100}%`,
-                            top: `${((bbox.page_height - (bbox.y + bbox.height)) / bbox.page_height) * 100}%`,
-                            width: `${(bbox.width / bbox.page_width) * 100}%`,
-                            height: `${(bbox.height / bbox.page_height) * 100}%`,
+                            left: `${(bbox.x / size.width) * 100}%`,
+                            top: `${((size.height - (bbox.y + bbox.height)) / size.height) * 100}%`,
+                            width: `${(bbox.width / size.width) * 100}%`,
+                            height: `${(bbox.height / size.height) * 100}%`,
                             backgroundColor: 'rgba(255, 255, 0, 0.3)',
                         }}
                     />
@@ -157,12 +170,14 @@ const PdfViewer = React.memo(function PdfViewer({ pdfUrl, sentences, currentId,
         const y = (e.clientY - rect.top) / rect.height;
 
         const pageData = sentencesByPage[pageNumber] || [];
+        const size = pageSizes[pageNumber];
+        if (!size) return;
         for (const sentence of pageData) {
             for (const bbox of sentence.pageBBoxes) {
-                const bLeft = bbox.x / bbox.page_width;
-                const bTop = (bbox.page_height - (bbox.y + bbox.height)) / bbox.page_height;
-                const bWidth = bbox.width / bbox.page_width;
-                const bHeight = bbox.height / bbox.page_height;
+                const bLeft = bbox.x / size.width;
+                const bTop = (size.height - (bbox.y + bbox.height)) / size.height;
+                const bWidth = bbox.width / size.width;
+                const bHeight = bbox.height / size.height;
 
                 if (x >= bLeft && x <= bLeft + bWidth && y >= bTop && y <= bTop + bHeight) {
                     onJump(sentence.id);
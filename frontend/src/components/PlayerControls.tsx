@@ -6,10 +6,13 @@ import { PlayArrow, Pause, SkipPrevious, SkipNext } from '@mui/icons-material';
 declare const process: {
   env: Record<string, string | undefined>;
 };
-import { ttsSentence, getVoices } from "../lib/tts-api";
+import { ttsSentence, ttsSentencesStream, getVoices } from "../lib/tts-api";
 
 type Sentence = { id: number; text: string };
 
+// Number of upcoming sentences synthesized while the current one plays
+const PREFETCH_AHEAD = 3;
+
 
 type Props = {
   sentences: Sentence[];
@@ -31,6 +34,8 @@ export default function PlayerControls({ sentences, currentId, onCurrentChange,
   const [speed, setSpeed] = useState<number>(1.0);
   // Track paused position for resume
   const [pausedAt, setPausedAt] = useState<number | null>(null);
+  // Audio URLs per sentence/voice/speed, including ones still being synthesized
+  const audioUrlsRef = useRef<Map<string, Promise<string>>>(new Map());
 
   // Fetch available TTS voices on mount
   useEffect(() => {
@@ -74,8 +79,48 @@ export default function PlayerControls({ sentences, currentId, onCurrentChange,
     }
     setIsPlaying(false);
     setPausedAt(null);
+    audioUrlsRef.current.clear();
   }, [sentences]);
 
+  function audioKey(id: number) {
+    return `${id}|${selectedVoice}|${speed}`;
+  }
+
+  /**
+   * Return the audio URL for a sentence, reusing a prefetched one when available.
+   * If the prefetch failed, the sentence is synthesized on its own.
+   */
+  function getAudioUrl(id: number): Promise<string> {
+    const single = () => ttsSentence(sentences[id].text, selectedVoice, speed).then((r) => r.audioUrl);
+    const prefetched = audioUrlsRef.current.get(audioKey(id));
+    return prefetched ? prefetched.catch(single) : single();
+  }
+
+  /**
+   * Synthesize the next few sentences after `id` over one streamed request, so auto-advance
+   * does not wait for TTS. The backend synthesizes them concurrently and each sentence is
+   * available as soon as its own audio is ready.
+   */
+  function prefetchAfter(id: number) {
+    const cache = audioUrlsRef.current;
+    const ids: number[] = [];
+    for (let i = id + 1; i <= Math.min(id + PREFETCH_AHEAD, sentences.length - 1); i++) {
+      if (!cache.has(audioKey(i))) ids.push(i);
+    }
+    if (ids.length === 0) return;
+    const resolvers = ids.map((i) => {
+      let resolve!: (url: string) => void;
+      let reject!: (err: unknown) => void;
+      const url = new Promise<string>((res, rej) => { resolve = res; reject = rej; });
+      url.catch(() => cache.delete(audioKey(i)));
+      cache.set(audioKey(i), url);
+      return { resolve, reject };
+    });
+    ttsSentencesStream(ids.map((i) => sentences[i].text), selectedVoice, speed, (n, audioUrl) => resolvers[n]?.resolve(audioUrl))
+      .then(() => { throw new Error("TTS stream ended early"); })
+      .catch((err) => resolvers.forEach((r) => r.reject(err)));
+  }
+
   /**
    * Play the sentence at the given index. If resumeFrom is provided, resumes from that time.
    * Handles TTS audio fetching and playback, and auto-advances to next sentence on end.
@@ -93,11 +138,11 @@ export default function PlayerControls({ sentences, currentId, onCurrentChange,
     audio.currentTime = 0;
     audio.onended = null;
 
-    const s = sentences[id];
     onCurrentChange(id);
 
     try {
-      const { audioUrl } = await ttsSentence(s.text, selectedVoice, speed);
+      const audioUrl = await getAudioUrl(id);
+      prefetchAfter(id);
       const apiBase = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
       audio.src = `${apiBase}${audioUrl}`;
       await audio.play();
@@ -23,3 +23,40 @@ export async function ttsSentence(text: string, voice: string, speed: number): P
 
     return res.json();
 }
+
+/**
+ * Synthesize several sentences and call `onAudio` with each one's audio URL as soon as it is ready.
+ * The backend streams one JSON line per sentence, in order.
+ */
+export async function ttsSentencesStream(
+    texts: string[],
+    voice: string,
+    speed: number,
+    onAudio: (index: number, audioUrl: string) => void,
+): Promise<void> {
+    const res = await fetch(`${API_BASE}/tts/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ texts, voice, speed }),
+    });
+
+    if (!res.ok || !res.body) {
+        throw new Error("TTS failed");
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split("\n");
+        buffered = lines.pop() ?? "";
+        for (const line of lines) {
+            if (!line) continue;
+            const { index, audioUrl } = JSON.parse(line);
+            onAudio(index, audioUrl);
+        }
+    }
+}
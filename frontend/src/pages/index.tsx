@@ -12,9 +12,11 @@ import PlayerControls from "../components/PlayerControls";
 import ChatInterface from "../components/ChatInterface";
 
 type Sentence = { id: number; text: string; bboxes: any[] };
+type PageSize = { page: number; width: number; height: number };
 
 export default function Home() {
   const [pdfSentences, setPdfSentences] = useState<Sentence[]>([]);
+  const [pdfPages, setPdfPages] = useState<PageSize[]>([]);
   const [pdfUrl, setPdfUrl] = useState<string | null>(null);
   const [activeSource, setActiveSource] = useState<'pdf' | 'chat'>('pdf');
   const [currentPdfId, setCurrentPdfId] = useState<number | null>(null);
@@ -193,6 +195,7 @@ export default function Home() {
                 embedModel={embedModel}
                 onUploaded={(data) => {
                   setPdfSentences(data?.sentences || []);
+                  setPdfPages(data?.pages || []);
                   const apiBase = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
                   if (data?.pdfUrl) {
                     setPdfUrl(`${apiBase}${data.pdfUrl}?t=${Date.now()}`);
@@ -255,6 +258,7 @@ export default function Home() {
               <PdfViewer
                 pdfUrl={pdfUrl}
                 sentences={pdfSentences}
+                pages={pdfPages}
                 currentId={activeSource === 'pdf' ? currentPdfId : null}
                 onJump={(id) => {
                   setActiveSource('pdf');
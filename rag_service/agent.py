@@ -1,31 +1,60 @@
 
+import re
+import random
+import time
 import asyncio
 import logging
+from collections import OrderedDict
 from typing import TypedDict, List, Annotated
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
-from models import get_llm, get_embedding_model
-from vectordb.qdrant import QdrantAdapter
+from langgraph.constants import TAG_NOSTREAM
+from models import get_llm
+from embed_queue import embed_batcher
+from vectordb.qdrant import get_db
+from rag import get_collection_name
 
 logger = logging.getLogger(__name__)
 
+# Recently embedded questions, keyed by (embedding model, question), so retries and repeated
+# questions skip the embedding round-trip.
+_QUERY_VECTOR_CACHE_SIZE = 32
+_query_vectors = OrderedDict()
+
+# LLMs that answered within the last LLM_WARM_INTERVAL seconds are assumed to still be loaded
+LLM_WARM_INTERVAL = 120.0
+_llm_last_used = {}
+
+# How long a model that is still loading (503) is waited for before giving up
+MODEL_LOAD_TIMEOUT = 60.0
+
+# A 503 whose message mentions loading/unavailable, in either order
+_MODEL_LOADING_RE = re.compile(r"(?=.*503)(?=.*(?:loading|unavailable))", re.IGNORECASE | re.DOTALL)
+
 async def invoke_with_retry(func, *args, **kwargs):
     """
-    Retry an async function if it fails with a 503 model loading error.
+    Retry an async function if it fails with a 503 model loading error, for up to
+    MODEL_LOAD_TIMEOUT seconds, so slow-loading models get as long as they need.
+    Waits use exponential backoff with full jitter, so concurrent callers do not retry in lockstep.
     """
-    max_retries = 10
-    delay = 5
-    for i in range(max_retries):
+    base_delay = 0.5
+    max_delay = 8.0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MODEL_LOAD_TIMEOUT
+    attempt = 0
+    while True:
         try:
             return await func(*args, **kwargs)
         except Exception as e:
-            err_str = str(e)
-            if "503" in err_str and ("loading" in err_str.lower() or "unavailable" in err_str.lower()):
-                logger.warning(f"Model is loading (503). Retrying in {delay}s... (Attempt {i+1}/{max_retries})")
-                await asyncio.sleep(delay)
-                continue
-            raise
-    raise Exception("Max retries reached while waiting for model to load.")
+            if not _MODEL_LOADING_RE.match(str(e)):
+                raise
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise Exception("Max retries reached while waiting for model to load.") from e
+            delay = min(remaining, random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+            attempt += 1
+            logger.warning(f"Model is loading (503). Retrying in {delay:.1f}s... (Attempt {attempt}, {remaining:.0f}s left)")
+            await asyncio.sleep(delay)
 
 
 
@@ -43,25 +72,40 @@ class AgentState(TypedDict):
 def retrieve(state: AgentState):
     pass
 
+async def embed_query(emb_model_name: str, question: str):
+    """
+    Embed a question, reusing the vector from a recent identical request when available.
+    Questions go through the shared embed batcher, so concurrent chats are embedded together
+    (and with chunks being indexed).
+    """
+    key = (emb_model_name, question)
+    if key in _query_vectors:
+        _query_vectors.move_to_end(key)
+        return _query_vectors[key]
+    query_vector = (await invoke_with_retry(embed_batcher.embed, emb_model_name, [question]))[0]
+    _query_vectors[key] = query_vector
+    if len(_query_vectors) > _QUERY_VECTOR_CACHE_SIZE:
+        _query_vectors.popitem(last=False)
+    return query_vector
+
 async def retrieve_node(state: AgentState):
     """
     Retrieve relevant context from the vector database for the given question.
     """
     question = state["question"]
+    if not question or not question.strip():
+        return {"context": ""}
     emb_model_name = state["embedding_model"]
-    embed_model = get_embedding_model(emb_model_name)
-    query_vector = await invoke_with_retry(embed_model.aembed_query, question)
+    query_vector = await embed_query(emb_model_name, question)
 
     collection_name = state.get("collection_name")
     if not collection_name:
         # Fallback to legacy naming
-        base_model_name = emb_model_name.split(":")[0]
-        safe_name = base_model_name.replace("-", "_").replace(".", "_").replace("/", "_")
-        collection_name = f"rag_{safe_name}"
+        collection_name = get_collection_name(emb_model_name)
 
-    db = QdrantAdapter()
+    db = get_db()
     results = await db.search(collection_name, query_vector, limit=5)
-    context = "\n\n".join([res["text"] for res in results])
+    context = "\n\n".join(res["text"] for res in results)
     return {"context": context}
 
 async def generate_node(state: AgentState):
@@ -81,14 +125,38 @@ async def generate_node(state: AgentState):
     messages.append(HumanMessage(content=question))
 
     response = await invoke_with_retry(llm.ainvoke, messages)
+    _llm_last_used[llm_name] = time.monotonic()
     return {"answer": response.content}
 
+async def warm_llm(llm_name: str):
+    """
+    Ask the LLM API/server for a single token so it loads the model, unless it was used recently.
+    Failures are only logged; the real request reports them.
+    """
+    last_used = _llm_last_used.get(llm_name)
+    if last_used is not None and time.monotonic() - last_used < LLM_WARM_INTERVAL:
+        return
+    try:
+        llm = get_llm(llm_name).bind(max_tokens=1)
+        await invoke_with_retry(llm.ainvoke, [HumanMessage(content="hi")], config={"tags": [TAG_NOSTREAM]})
+        _llm_last_used[llm_name] = time.monotonic()
+    except Exception as e:
+        logger.debug(f"LLM warm-up for {llm_name} failed: {e}")
+
+async def answer_node(state: AgentState):
+    """
+    Retrieve context and generate the answer in one step.
+    The LLM is warmed up while the question is embedded and searched, so a cold model
+    loads in parallel with retrieval instead of after it.
+    """
+    retrieved, _ = await asyncio.gather(retrieve_node(state), warm_llm(state["llm_model"]))
+    generated = await generate_node({**state, **retrieved})
+    return {**retrieved, **generated}
+
 
 # Define the workflow graph
 workflow = StateGraph(AgentState)
-workflow.add_node("retrieve", retrieve_node)
-workflow.add_node("generate", generate_node)
-workflow.set_entry_point("retrieve")
-workflow.add_edge("retrieve", "generate")
-workflow.add_edge("generate", END)
+workflow.add_node("answer", answer_node)
+workflow.set_entry_point("answer")
+workflow.add_edge("answer", END)
 app = workflow.compile()
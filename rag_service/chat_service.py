@@ -1,13 +1,16 @@
 """
 chat_service.py - Business logic for chat endpoint in RAG Service
 
-This module provides the chat handling logic for the /chat endpoint.
+This module provides the chat handling logic for the /chat and /chat/stream endpoints.
 """
 
-from langchain_core.messages import AIMessage, HumanMessage
+import orjson
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from agent import app as agent_app
 
-async def handle_chat(req):
+def build_inputs(req):
+    """Build the agent's initial state from a chat request."""
     chat_history = []
     for msg in req.history:
         if msg["role"] == "user":
@@ -15,7 +18,7 @@ async def handle_chat(req):
         elif msg["role"] == "assistant":
             chat_history.append(AIMessage(content=msg["content"]))
 
-    inputs = {
+    return {
         "question": req.question,
         "chat_history": chat_history,
         "llm_model": req.llm_model,
@@ -24,5 +27,26 @@ async def handle_chat(req):
         "context": "",
         "answer": "",
     }
-    result = await agent_app.ainvoke(inputs)
+
+async def handle_chat(req):
+    result = await agent_app.ainvoke(build_inputs(req))
     return {"answer": result["answer"], "context": result["context"]}
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+async def stream_chat(req):
+    """
+    Run the agent and yield server-sent events as the answer is generated:
+    a "token" event per LLM token, then a "done" event with the full answer and context.
+    """
+    async for mode, chunk in agent_app.astream(build_inputs(req), stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            message, _ = chunk
+            if isinstance(message, AIMessageChunk) and message.content:
+                yield sse_event("token", {"content": message.content})
+        elif mode == "updates":
+            for update in chunk.values():
+                if update and "answer" in update:
+                    yield sse_event("done", {"answer": update["answer"], "context": update.get("context", "")})
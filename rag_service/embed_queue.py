@@ -0,0 +1,168 @@
+"""
+embed_queue.py - Request-coalescing batcher for embedding calls in RAG Service
+
+Texts submitted by concurrent callers (/index requests and chat questions) are queued and sent to the
+LLM API/server together: the worker collects up to EMBED_BATCH_SIZE texts, waiting at most
+EMBED_MAX_WAIT_MS for more to arrive, and keeps up to EMBED_CONCURRENCY batches in flight.
+
+Environment Variables:
+- EMBED_BATCH_SIZE: Texts per embeddings request (default: 32)
+- EMBED_CONCURRENCY: Embeddings requests in flight at once (default: 4)
+- EMBED_MAX_WAIT_MS: How long a partial batch waits for more texts (default: 10)
+"""
+
+import os
+import re
+import asyncio
+import logging
+from collections import defaultdict
+from typing import List, Optional
+
+from models import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+# Statuses with which LLM APIs/servers reject a batch that is too large for them
+_BATCH_REJECTED_STATUSES = {413, 422}
+# Other servers answer 400/500 with a message naming the limit; any other error is not about size
+_BATCH_LIMIT_MESSAGE = re.compile(r"batch|too (large|long|many)|exceed|maximum|limit|context length", re.IGNORECASE)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Return the HTTP status of an httpx or OpenAI client error, if it has one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _is_batch_rejection(error: Exception) -> bool:
+    """True if the server rejected the request for its batch or input size."""
+    status = _status_code(error)
+    if status in _BATCH_REJECTED_STATUSES:
+        return True
+    return status in (400, 500) and bool(_BATCH_LIMIT_MESSAGE.search(str(error)))
+
+
+async def _embed_batch(embed_model, batch: List[str]) -> List[List[float]]:
+    """
+    Embed one batch of texts.
+    Some LLM APIs/servers (like DMR) have strict batch size limits; if the server rejects the batch,
+    it is split in half and each half is retried, down to single texts. Any other error (server down,
+    unknown model) is raised at once.
+    """
+    try:
+        return await embed_model.aembed_documents(batch)
+    except Exception as e:
+        if len(batch) == 1 or not _is_batch_rejection(e):
+            raise
+        half = len(batch) // 2
+        return await _embed_batch(embed_model, batch[:half]) + await _embed_batch(embed_model, batch[half:])
+
+
+class EmbedBatcher:
+    """
+    Coalesces embedding requests from concurrent callers into batched calls.
+    Each queued item is (model name, text, future); the worker resolves the futures with the vectors.
+    """
+    def __init__(self, max_batch: int = EMBED_BATCH_SIZE, max_wait_ms: float = EMBED_MAX_WAIT_MS,
+                 concurrency: int = EMBED_CONCURRENCY) -> None:
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._worker: Optional[asyncio.Task] = None
+        self._flushes: dict = {}  # flush task -> its batch
+
+    def start(self) -> None:
+        """Start the worker task on the running event loop (no-op if already running)."""
+        if self._worker is None or self._worker.done():
+            # Fresh queue and semaphore: a previous stop() may have left permits taken by cancelled flushes
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker; texts still queued or in flight fail with CancelledError."""
+        if self._worker is None:
+            return
+        flushes = dict(self._flushes)
+        self._worker.cancel()
+        for task in flushes:
+            task.cancel()
+        await asyncio.gather(self._worker, *flushes, return_exceptions=True)
+        for batch in flushes.values():
+            for _, _, future in batch:
+                future.cancel()
+        while not self._queue.empty():
+            self._queue.get_nowait()[2].cancel()
+        self._worker = None
+
+    async def embed(self, model_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the given model, sharing requests with other callers. Vectors are in text order."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        for text, future in zip(texts, futures):
+            self._queue.put_nowait((model_name, text, future))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _run(self) -> None:
+        """Collect queued items into batches and hand each batch to a flush task."""
+        loop = asyncio.get_running_loop()
+        items = []
+        try:
+            while True:
+                items = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(items) < self.max_batch:
+                    if not self._queue.empty():
+                        items.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                by_model = defaultdict(list)
+                for item in items:
+                    by_model[item[0]].append(item)
+                for model_name, batch in by_model.items():
+                    await self._semaphore.acquire()
+                    task = asyncio.create_task(self._flush(model_name, batch))
+                    self._flushes[task] = batch
+                    task.add_done_callback(lambda t: self._flushes.pop(t, None))
+                    items = [item for item in items if item[0] != model_name]
+        except asyncio.CancelledError:
+            for _, _, future in items:
+                future.cancel()
+            raise
+
+    async def _flush(self, model_name: str, batch: list) -> None:
+        """Embed one batch and resolve its futures with the vectors (or the error)."""
+        try:
+            vectors = await _embed_batch(get_embedding_model(model_name), [text for _, text, _ in batch])
+        except Exception as e:
+            logger.warning("Embedding batch of %d texts failed: %s", len(batch), e)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, _, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            self._semaphore.release()
+
+
+embed_batcher = EmbedBatcher()
@@ -6,6 +6,7 @@ This module provides endpoints for document indexing, chat with retrieval-augmen
 Endpoints:
 - POST /index: Index a document for retrieval.
 - POST /chat: Chat with RAG using LLM and embedding models.
+- POST /chat/stream: Same as /chat, streamed as server-sent events.
 - GET /status: Check if a collection exists in the vector DB.
 - GET /models: List available LLM and embedding models from the LLM API/server.
 - GET /health/model: Check if a specific model is ready.
@@ -19,26 +20,77 @@ Dependencies:
 """
 
 import os
+import time
+import queue
+import asyncio
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional
 
+import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_core.messages import AIMessage, HumanMessage
-from httpx import AsyncClient
 
-
-from agent import app as agent_app
-from rag import index_document
-from vectordb.qdrant import QdrantAdapter
-from models import check_chat_model_ready, check_embed_model_ready, fetch_available_models
-from chat_service import handle_chat
+from rag import index_document, sweep_staging_collections
+from embed_queue import embed_batcher
+from vectordb.qdrant import get_db
+from models import check_chat_model_ready, check_embed_model_ready, fetch_available_models, is_embedding_model_by_keyword
+from chat_service import handle_chat, stream_chat, sse_event
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="RAG Service")
+logger = logging.getLogger(__name__)
+
+# One pooled client for all outgoing calls (LLM API/server and PDF downloads from the backend),
+# so connections are kept alive across requests instead of being set up per call.
+http_client = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+)
+
+
+# /models responses are reused for MODELS_CACHE_TTL seconds; the lock makes concurrent
+# misses share one upstream call.
+MODELS_CACHE_TTL = 30.0
+_models_cache = {"at": 0.0, "data": None}
+_models_lock = asyncio.Lock()
+
+
+# Caps on requests doing work at once: indexing is CPU-heavy (PDF parsing) and makes many
+# embedding calls, chat holds an LLM generation; excess requests wait their turn.
+INDEX_SEM = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_INDEX", "2")))
+CHAT_SEM = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_CHAT", "16")))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log records are queued by the request handlers and written out by a listener thread,
+    # so slow log I/O never blocks the event loop.
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(listener.queue)]
+    listener.start()
+    embed_batcher.start()
+    await sweep_staging_collections()
+    yield
+    await embed_batcher.stop()
+    await http_client.aclose()
+    listener.stop()
+    root.handlers = handlers
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Dependency returning the shared LLM API/server client."""
+    return http_client
+
+
+app = FastAPI(title="RAG Service", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -66,24 +118,26 @@ class ChatRequest(BaseModel):
 
 
 @app.post("/index")
-async def index_endpoint(req: IndexRequest):
+async def index_endpoint(req: IndexRequest, client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Index a document for retrieval-augmented generation.
     Args:
         req (IndexRequest): Document text, embedding model, and optional metadata.
+        client (httpx.AsyncClient): Shared HTTP client (injected), used to download the PDF.
     Returns:
         Result of indexing operation.
     """
     try:
-        result = await index_document(
-            text=req.text,
-            embedding_model_name=req.embedding_model,
-            metadata=req.metadata,
-        )
+        async with INDEX_SEM:
+            result = await index_document(
+                text=req.text,
+                embedding_model_name=req.embedding_model,
+                metadata=req.metadata,
+                client=client,
+            )
         return result
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Indexing failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -97,14 +151,36 @@ async def chat_endpoint(req: ChatRequest):
         Answer and context from the agent.
     """
     try:
-        result = await handle_chat(req)
+        async with CHAT_SEM:
+            result = await handle_chat(req)
         return result
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Chat failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """
+    Streaming chat endpoint for retrieval-augmented generation.
+    Args:
+        req (ChatRequest): User question, LLM/embedding models, chat history, collection name.
+    Returns:
+        Server-sent events: "token" events while the answer is generated, then "done" with the
+        answer and context, or "error" if the agent fails.
+    """
+    async def events():
+        try:
+            async with CHAT_SEM:
+                async for event in stream_chat(req):
+                    yield event
+        except Exception as e:
+            logger.exception("Streaming chat failed")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.get("/status")
 async def status_endpoint(collection_name: str):
     """
@@ -115,7 +191,7 @@ async def status_endpoint(collection_name: str):
         Status and collection name.
     """
     try:
-        db = QdrantAdapter()
+        db = get_db()
         exists = await db.collection_exists(collection_name)
         return {"status": "ready" if exists else "not_ready", "collection": collection_name}
     except Exception as e:
@@ -124,51 +200,65 @@ async def status_endpoint(collection_name: str):
 
 
 @app.get("/models")
-async def get_models():
+async def get_models(client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Fetch available LLM and embedding models from the LLM API/server (OpenAI-compatible).
+    Args:
+        client (httpx.AsyncClient): Shared LLM API/server client (injected).
     Returns:
         List of model IDs or fallback defaults if the LLM API/server is unavailable.
     """
-    return await fetch_available_models()
+    async with _models_lock:
+        if _models_cache["data"] is not None and time.monotonic() - _models_cache["at"] < MODELS_CACHE_TTL:
+            return _models_cache["data"]
+        data = await fetch_available_models(client)
+        _models_cache.update(at=time.monotonic(), data=data)
+        return data
 
 
 @app.get("/health/model")
-async def model_health_endpoint(model: str):
+async def model_health_endpoint(model: str, client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Check if a specific model is available and ready.
+    Embedding models (by keyword in the id) get the embeddings probe; everything else gets the chat probe.
     Args:
         model (str): Model ID to check.
+        client (httpx.AsyncClient): Shared LLM API/server client (injected).
     Returns:
         Model readiness status.
     """
-    ready = await is_chat_model_ready(model)
+    if is_embedding_model_by_keyword(model):
+        ready = await check_embed_model_ready(model, client)
+    else:
+        ready = await check_chat_model_ready(model, client)
     return {"model": model, "ready": ready}
 
 
 @app.get("/health/is_chat_model_ready")
-async def is_chat_model_ready(model: str):
+async def is_chat_model_ready(model: str, client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Check if a chat/LLM model is ready (probes readiness).
     Args:
         model (str): Model ID to check.
+        client (httpx.AsyncClient): Shared LLM API/server client (injected).
     Returns:
         Model readiness status.
     """
-    ready = await check_chat_model_ready(model)
+    ready = await check_chat_model_ready(model, client)
     return {"model": model, "chat_model_ready": ready}
 
 
 @app.get("/health/is_embed_model_ready")
-async def is_embed_model_ready(model: str):
+async def is_embed_model_ready(model: str, client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Check if an embedding model is ready (probes readiness).
     Args:
         model (str): Model ID to check.
+        client (httpx.AsyncClient): Shared LLM API/server client (injected).
     Returns:
         Model readiness status.
     """
-    ready = await check_embed_model_ready(model)
+    ready = await check_embed_model_ready(model, client)
     return {"model": model, "embed_model_ready": ready}
 
 
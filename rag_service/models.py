@@ -3,60 +3,102 @@ Model utilities for LLM API/OpenAI-compatible APIs.
 """
 
 import os
+import time
+from typing import Optional
 from dotenv import load_dotenv
 load_dotenv()
 import httpx
+import orjson
 import asyncio
 import logging
+from functools import lru_cache
 from fastapi import HTTPException
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
 def _get_base_url() -> str:
-    """Get the LLM API base URL, ensuring it ends with /v1."""
+    """Get the LLM API base URL, ensuring it ends with /v1. Computed once; LLM_API_URL is read at startup."""
     base_url = os.getenv("LLM_API_URL")
     return base_url if base_url.endswith("/v1") else f"{base_url}/v1"
 
-async def fetch_available_models():
+# Model ids listed by each LLM API/server, reused for MODELS_LIST_TTL seconds by the readiness checks.
+# Failed listings are remembered for MODELS_LIST_ERROR_TTL seconds, so a burst of checks against
+# a server that is down fails fast instead of each waiting for its own timeout.
+MODELS_LIST_TTL = 10.0
+MODELS_LIST_ERROR_TTL = 2.0
+_models_list_cache: dict[str, tuple[float, Optional[frozenset]]] = {}  # base_url -> (expires at, ids or None)
+_models_list_locks: dict[str, asyncio.Lock] = {}
+
+def _cached_models(base_url: str) -> tuple[bool, Optional[frozenset]]:
+    """Return (True, model ids or None if the listing failed) while a listing for base_url is cached, else (False, None)."""
+    cached = _models_list_cache.get(base_url)
+    if cached and time.monotonic() < cached[0]:
+        return True, cached[1]
+    return False, None
+
+async def _list_models(client: httpx.AsyncClient, base_url: str, timeout: float = 5.0) -> Optional[frozenset]:
+    """
+    Return the ids of the models listed at {base_url}/models, or None if the server did not return them.
+    Results are cached per base_url (failures for a shorter time); concurrent refreshes of the same
+    base_url wait on one lock and share a single request.
+    """
+    hit, model_ids = _cached_models(base_url)
+    if hit:
+        return model_ids
+    async with _models_list_locks.setdefault(base_url, asyncio.Lock()):
+        hit, model_ids = _cached_models(base_url)
+        if hit:
+            return model_ids
+        try:
+            resp = await client.get(f"{base_url}/models", timeout=timeout)
+            model_ids = frozenset(m['id'] for m in orjson.loads(resp.content).get('data', [])) if resp.status_code == 200 else None
+        except httpx.HTTPError as e:
+            logger.warning("Listing models at %s failed: %s", base_url, e)
+            model_ids = None
+        ttl = MODELS_LIST_TTL if model_ids is not None else MODELS_LIST_ERROR_TTL
+        _models_list_cache[base_url] = (time.monotonic() + ttl, model_ids)
+        return model_ids
+
+async def fetch_available_models(client: httpx.AsyncClient):
     """
     Fetch available models from the LLM API/server (OpenAI-compatible) and categorize as embedding, llm, or unknown.
+    Args:
+        client (httpx.AsyncClient): Shared HTTP client.
     Returns:
         dict: {"embedding_models": [...], "llm_models": [...], "unknown_models": [...], "all_models": [...]}
     """
-    llm_api_url = os.getenv("LLM_API_URL")
     try:
-        if not llm_api_url.endswith("/v1"):
-            llm_api_url = f"{llm_api_url}/v1"
-
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"{llm_api_url}/models")
-            if resp.status_code == 200:
-                data = resp.json()
-                # OpenAI-compatible: models are in data['data']
-                models = data.get('data', []) if isinstance(data, dict) else data
-                model_ids = [m['id'] if isinstance(m, dict) and 'id' in m else m for m in models]
-                embedding_models = [m for m in model_ids if is_embedding_model_by_keyword(m)]
-                llm_models = [m for m in model_ids if is_llm_model_by_keyword(m)]
-                not_embedding_models = [m for m in model_ids if m not in embedding_models]
-                not_llm_models = [m for m in model_ids if m not in llm_models]
-                result = {
-                    "embedding_models": embedding_models,
-                    "llm_models": llm_models,
-                    "all_models": model_ids,
-                    "not_embedding_models": not_embedding_models,
-                    "not_llm_models": not_llm_models
-                }
-                logger.info(f"LLM API/server Models Response: {result}")
-                return result
-            else:
-                error_msg = f"LLM API/server Fetch Failed {resp.status_code}: {resp.text}"
-                print(error_msg, flush=True)
-                raise HTTPException(status_code=500, detail=error_msg)
+        llm_api_url = _get_base_url()
+
+        resp = await client.get(f"{llm_api_url}/models")
+        if resp.status_code == 200:
+            data = orjson.loads(resp.content)
+            # OpenAI-compatible: models are in data['data']
+            models = data.get('data', []) if isinstance(data, dict) else data
+            model_ids = [m['id'] if isinstance(m, dict) and 'id' in m else m for m in models]
+            embedding_models = [m for m in model_ids if is_embedding_model_by_keyword(m)]
+            llm_models = [m for m in model_ids if is_llm_model_by_keyword(m)]
+            not_embedding_models = [m for m in model_ids if m not in embedding_models]
+            not_llm_models = [m for m in model_ids if m not in llm_models]
+            result = {
+                "embedding_models": embedding_models,
+                "llm_models": llm_models,
+                "all_models": model_ids,
+                "not_embedding_models": not_embedding_models,
+                "not_llm_models": not_llm_models
+            }
+            logger.info(f"LLM API/server Models Response: {result}")
+            return result
+        else:
+            error_msg = f"LLM API/server Fetch Failed {resp.status_code}: {resp.text}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=500, detail=error_msg)
     except Exception as e:
         error_msg = f"Error fetching models from LLM API/server: {str(e)}"
-        print(error_msg, flush=True)
+        logger.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 # Identify embedding models by keywords in model id
@@ -80,9 +122,12 @@ def is_llm_model_by_keyword(model_id: str) -> bool:
     keywords = ["chat", "instruct", "completion", "base", "llama", "mistral", "qwen", "deepseek", "vicuna", "falcon", "gpt", "codellama", "phi", "mixtral", "yi", "zephyr", "dbrx", "command", "orca", "hermes", "openchat", "wizard", "llava", "starling", "solar"]
     return any(k in name for k in keywords)
 
+@lru_cache(maxsize=16)
 def get_llm(model_name: str, temperature: float = 0.0):
     """
     Return a configured ChatOpenAI client for the given model.
+    Clients are cached per (model name, temperature), so repeated calls reuse the same object
+    and its underlying HTTP connection pool.
     """
     return ChatOpenAI(
         model=model_name,
@@ -91,9 +136,12 @@ def get_llm(model_name: str, temperature: float = 0.0):
         api_key="sk-no-key-required"
     )
 
+@lru_cache(maxsize=16)
 def get_embedding_model(model_name: str):
     """
     Return a configured OpenAIEmbeddings client for the given model.
+    Clients are cached per model name, so repeated calls reuse the same object
+    and its underlying HTTP connection pool.
     """
     return OpenAIEmbeddings(
         model=model_name,
@@ -102,94 +150,112 @@ def get_embedding_model(model_name: str):
         check_embedding_ctx_length=False
     )
 
-async def check_chat_model_ready(model_name: str) -> bool:
+async def _list_and_probe(client: httpx.AsyncClient, base_url: str, path: str, payload: dict, list_timeout: float, probe_timeout: float):
+    """
+    Fetch the model list and send the first readiness probe concurrently, so a ready model costs one round trip.
+    Returns (model_ids, probe response); either may be the exception raised while fetching it.
+    """
+    return await asyncio.gather(
+        _list_models(client, base_url, timeout=list_timeout),
+        client.post(f"{base_url}{path}", json=payload, timeout=probe_timeout),
+        return_exceptions=True,
+    )
+
+def _is_listed(model_ids, model_name: str) -> bool:
+    """True if the model list was fetched and contains model_name."""
+    return isinstance(model_ids, frozenset) and model_name in model_ids
+
+async def check_chat_model_ready(model_name: str, client: httpx.AsyncClient) -> bool:
     """
     Check if the supplied model is a chat model and is ready in the LLM API/server.
     Returns True if ready, False if not ready or not found.
     """
     base_url = _get_base_url()
+    hit, model_ids = _cached_models(base_url)
+    if hit and model_ids is None:
+        return False  # server recently down; a cached listing still gets the probe, which may succeed
     try:
-        async with httpx.AsyncClient() as client:
-            # 1. Check if model exists
-            resp = await client.get(f"{base_url}/models", timeout=2.0)
-            if resp.status_code != 200:
-                return False
-            models = resp.json().get('data', [])
-            model_ids = [m['id'] for m in models]
-            if model_name not in model_ids:
-                return False
+        payload = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": "hi"}],
+            "max_tokens": 1
+        }
+        # 1. Check if model exists while sending the first probe; a successful probe is enough
+        model_ids, chat_resp = await _list_and_probe(client, base_url, "/chat/completions", payload, 2.0, 5.0)
+        if isinstance(chat_resp, httpx.Response) and chat_resp.status_code == 200:
+            return True
+        if not _is_listed(model_ids, model_name):
+            return False
 
-            # 2. Probe with Chat Completion
-            payload = {
-                "model": model_name,
-                "messages": [{"role": "user", "content": "hi"}],
-                "max_tokens": 1
-            }
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
+        # 2. Probe with Chat Completion
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                if attempt:
                     chat_resp = await client.post(f"{base_url}/chat/completions", json=payload, timeout=5.0)
-                    logger.info(f"Chat completion probe response status: {chat_resp.status_code}")
-                    if chat_resp.status_code == 200:
-                        return True
-                    if chat_resp.status_code == 503 and attempt < max_retries - 1:
-                        await asyncio.sleep(2 ** attempt)  # exponential backoff
-                        continue
-                    if chat_resp.status_code == 503:
-                        return True
-                    if chat_resp.status_code == 500:
-                        return False
-                    break
-                except Exception as e:
-                    logging.exception("Exception during chat completion probe : %s", e)
+                elif isinstance(chat_resp, Exception):
+                    raise chat_resp
+                logger.info(f"Chat completion probe response status: {chat_resp.status_code}")
+                if chat_resp.status_code == 200:
+                    return True
+                if chat_resp.status_code == 503 and attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # exponential backoff
+                    continue
+                if chat_resp.status_code == 503:
+                    return True
+                if chat_resp.status_code == 500:
                     return False
-                
-            # 3. Fallback: If model is listed and not 503, assume reachable
-            return True
+                break
+            except Exception as e:
+                logging.exception("Exception during chat completion probe : %s", e)
+                return False
+            
+        # 3. Fallback: If model is listed and not 503, assume reachable
+        return True
 
     except Exception:
         logging.exception("Exception during model readiness check")
         return False
 
-async def check_embed_model_ready(model_name: str) -> bool:
+async def check_embed_model_ready(model_name: str, client: httpx.AsyncClient) -> bool:
     """
     Check if the supplied model is an embedding model and is ready in the LLM API/server.
     Returns True if ready, False if not ready or not found.
     """
     base_url = _get_base_url()
+    hit, model_ids = _cached_models(base_url)
+    if hit and model_ids is None:
+        return False  # server recently down; a cached listing still gets the probe, which may succeed
     try:
-        async with httpx.AsyncClient() as client:
-            # 1. Check if model exists
-            resp = await client.get(f"{base_url}/models", timeout=5.0)
-            if resp.status_code != 200:
-                return False
-            models = resp.json().get('data', [])
-            model_ids = [m['id'] for m in models]
-            if model_name not in model_ids:
-                return False
+        payload = {"model": model_name, "input": "hi"}
+        # 1. Check if model exists while sending the first probe; a successful probe is enough
+        model_ids, emb_resp = await _list_and_probe(client, base_url, "/embeddings", payload, 5.0, 2.0)
+        if isinstance(emb_resp, httpx.Response) and emb_resp.status_code == 200:
+            return True
+        if not _is_listed(model_ids, model_name):
+            return False
 
-            # 2. Probe with Embeddings
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    emb_resp = await client.post(
-                        f"{base_url}/embeddings",
-                        json={"model": model_name, "input": "hi"},
-                        timeout=2.0
-                    )
-                    if emb_resp.status_code == 200:
-                        return True
-                    if emb_resp.status_code == 503 and attempt < max_retries - 1:
-                        await asyncio.sleep(2 ** attempt)  # exponential backoff
-                        continue
-                    if emb_resp.status_code == 503:
-                        return False
-                    break
-                except Exception as e:
-                    logging.exception("Exception during embedding probe : %s", e)
+        # 2. Probe with Embeddings
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                if attempt:
+                    emb_resp = await client.post(f"{base_url}/embeddings", json=payload, timeout=2.0)
+                elif isinstance(emb_resp, Exception):
+                    raise emb_resp
+                if emb_resp.status_code == 200:
+                    return True
+                if emb_resp.status_code == 503 and attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # exponential backoff
+                    continue
+                if emb_resp.status_code == 503:
                     return False
+                break
+            except Exception as e:
+                logging.exception("Exception during embedding probe : %s", e)
+                return False
 
-            # 3. Fallback: If model is listed and not 200 or 503, assume not reachable
-            return False
+        # 3. Fallback: If model is listed and not 200 or 503, assume not reachable
+        return False
     except Exception:
         return False
@@ -1,22 +1,51 @@
 
 import os
+import asyncio
+import uuid
+import hashlib
+import logging
+import weakref
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
+import aiofiles
 import httpx
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from unstructured.partition.pdf import partition_pdf
 
-from models import get_embedding_model
-from vectordb.qdrant import QdrantAdapter
+from embed_queue import embed_batcher
+from vectordb.qdrant import QdrantAdapter, get_db
+
+logger = logging.getLogger(__name__)
 
 TEMP_PDF_DIR = "/tmp/pdfs"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 os.makedirs(TEMP_PDF_DIR, exist_ok=True)
 
+# Chunks are embedded and stored in slices of INDEX_BATCH_SIZE; each slice is upserted
+# while the next one is being embedded.
+INDEX_BATCH_SIZE = 256
+
+# Marks the collections a document is indexed into before it is published under its final name
+STAGING_MARKER = "_staging_"
+
+# One lock per collection name, so two runs for the same document (or two legacy texts sharing
+# a collection) never index it at the same time; a lock is dropped once no run holds it.
+_INDEX_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# The splitter keeps no per-call state, so one instance is shared by all requests
+_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+
+# Characters that are not allowed in collection names, mapped to "_" in one pass
+_SAFE_NAME_TABLE = str.maketrans({"-": "_", ".": "_", "/": "_"})
+
+@lru_cache(maxsize=512)
 def get_collection_name(embedding_model_name: str, file_hash: Optional[str] = None) -> str:
     """
     Generate a safe collection name for the vector database based on the embedding model and file hash.
     """
     base_model_name = embedding_model_name.split(":")[0]
-    safe_model_name = base_model_name.replace("-", "_").replace(".", "_").replace("/", "_")
+    safe_model_name = base_model_name.translate(_SAFE_NAME_TABLE)
     if file_hash:
         return f"rag_{safe_model_name}_{file_hash}"
     return f"rag_{safe_model_name}"
@@ -25,11 +54,9 @@ def split_text(text: str) -> List[str]:
     """
     Split text into chunks using RecursiveCharacterTextSplitter.
     """
-    from langchain_text_splitters import RecursiveCharacterTextSplitter
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-    return splitter.split_text(text)
+    return _SPLITTER.split_text(text)
 
-async def download_and_parse_pdf(upload_id: str, backend_url: str) -> Optional[List[str]]:
+async def download_and_parse_pdf(upload_id: str, backend_url: str, client: httpx.AsyncClient) -> Optional[List[str]]:
     """
     Download a PDF from the backend and parse it into text chunks using unstructured.
     Returns a list of chunked strings, or None if download/parsing fails.
@@ -37,34 +64,35 @@ async def download_and_parse_pdf(upload_id: str, backend_url: str) -> Optional[L
     pdf_url = f"{backend_url}/{upload_id}.pdf"
     local_path = os.path.join(TEMP_PDF_DIR, f"{upload_id}.pdf")
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(pdf_url, timeout=30.0)
-            if resp.status_code == 200:
-                with open(local_path, "wb") as f:
-                    f.write(resp.content)
-                elements = partition_pdf(filename=local_path)
-                from unstructured.chunking.title import chunk_by_title
-                chunked_elements = chunk_by_title(elements)
-                chunks = [str(c) for c in chunked_elements]
-                try:
-                    os.remove(local_path)
-                except Exception:
-                    pass
-                return chunks
-            else:
-                print(f"Failed to download PDF from {pdf_url}: {resp.status_code}", flush=True)
+        # Stream the PDF straight to disk so it is never held in memory as a whole
+        async with client.stream("GET", pdf_url, timeout=60.0) as resp:
+            if resp.status_code != 200:
+                logger.warning("Failed to download PDF from %s: %s", pdf_url, resp.status_code)
                 return None
+            async with aiofiles.open(local_path, "wb") as f:
+                async for chunk in resp.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+        # Parsing takes seconds to minutes on large PDFs; keep it off the event loop
+        elements = await asyncio.to_thread(partition_pdf, filename=local_path)
+        from unstructured.chunking.title import chunk_by_title
+        chunked_elements = await asyncio.to_thread(chunk_by_title, elements)
+        chunks = [str(c) for c in chunked_elements]
+        try:
+            os.remove(local_path)
+        except Exception:
+            pass
+        return chunks
     except Exception as e:
-        print(f"Error downloading/parsing PDF: {e}", flush=True)
+        logger.exception("Error downloading/parsing PDF: %s", e)
         return None
 
-async def get_chunks(text: str, file_hash: Optional[str], upload_id: Optional[str]) -> List[str]:
+async def get_chunks(text: str, file_hash: Optional[str], upload_id: Optional[str], client: httpx.AsyncClient) -> List[str]:
     """
     Get text chunks from either a PDF (if file_hash and upload_id are present) or from plain text.
     """
     if file_hash and upload_id:
         backend_url = os.getenv("BACKEND_URL", "http://backend:8000")
-        chunks = await download_and_parse_pdf(upload_id, backend_url)
+        chunks = await download_and_parse_pdf(upload_id, backend_url, client)
         if chunks:
             return chunks
         # fallback to text splitting if PDF fails
@@ -72,57 +100,143 @@ async def get_chunks(text: str, file_hash: Optional[str], upload_id: Optional[st
     else:
         return split_text(text)
 
-async def generate_embeddings(chunks: List[str], embedding_model_name: str) -> List[List[float]]:
+async def generate_embeddings(chunks: List[str], embedding_model_name: str, known: Optional[Dict[str, List[float]]] = None) -> List[List[float]]:
     """
     Generate embeddings for each chunk using the specified embedding model.
-    Note: Some LLM APIs/servers (like DMR) may have strict batch size limits.
+    Repeated chunks (headers, footers, boilerplate) are embedded once; `known` maps texts to vectors
+    already computed (e.g. for earlier slices of the same document) and is updated with the new ones.
+    Unique chunks go through the shared embed batcher, which batches them together with
+    chunks from concurrent indexing requests.
+    Vectors are returned in chunk order.
     """
-    embed_model = get_embedding_model(embedding_model_name)
-    batch_size = 1  # LLM API/server strict batch size limits
-    vectors = []
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        batch_vectors = await embed_model.aembed_documents(batch)
-        vectors.extend(batch_vectors)
-    return vectors
+    known = {} if known is None else known
+    unique = [chunk for chunk in dict.fromkeys(chunks) if chunk not in known]
+    known.update(zip(unique, await embed_batcher.embed(embedding_model_name, unique)))
+    return [known[chunk] for chunk in chunks]
 
-async def index_chunks_to_db(collection_name: str, chunks: List[str], metadatas_list: List[Dict[str, Any]], vectors: List[List[float]], db_client: QdrantAdapter) -> None:
+async def index_chunks_to_db(collection_name: str, chunks: List[str], metadata: Dict[str, Any], vectors: List[List[float]], db_client: QdrantAdapter, start_index: int = 0) -> None:
     """
     Index the chunks and their embeddings into the vector database.
+    The document metadata is passed once; the adapter fans it out into each chunk's payload.
+    `start_index` is the position of the first chunk in the document.
     """
-    await db_client.index_documents(collection_name, chunks, metadatas_list, vectors)
+    await db_client.index_documents(collection_name, chunks, metadata, vectors, start_index)
 
-async def index_document(text: str, embedding_model_name: str, metadata: Dict[str, Any] = None):
+async def embed_and_index_chunks(collection_name: str, chunks: List[str], metadata: Dict[str, Any], embedding_model_name: str, db_client: QdrantAdapter) -> None:
+    """
+    Embed and store the chunks in slices of INDEX_BATCH_SIZE, pipelined so that each slice is
+    upserted while the next one is embedded.
+    """
+    known = {}
+    upsert = None
+    try:
+        for start in range(0, len(chunks), INDEX_BATCH_SIZE):
+            batch = chunks[start:start + INDEX_BATCH_SIZE]
+            vectors = await generate_embeddings(batch, embedding_model_name, known)
+            if upsert:
+                await upsert
+            upsert = asyncio.create_task(index_chunks_to_db(collection_name, batch, metadata, vectors, db_client, start))
+        if upsert:
+            await upsert
+    finally:
+        if upsert and not upsert.done():
+            upsert.cancel()
+
+def _index_lock(collection_name: str) -> asyncio.Lock:
+    """Return the lock serializing indexing runs into collection_name."""
+    lock = _INDEX_LOCKS.get(collection_name)
+    if lock is None:
+        lock = _INDEX_LOCKS[collection_name] = asyncio.Lock()
+    return lock
+
+async def index_document(text: str, embedding_model_name: str, metadata: Dict[str, Any] = None, client: httpx.AsyncClient = None):
     """
     Indexes a document into the vector database.
     If file_hash is present in metadata, it creates a unique collection and uses unstructured for parsing.
-    Otherwise falls back to simple text indexing (legacy).
+    The collection is written under a staging name and published under its final name only once
+    every chunk is stored, so /status and later requests never see a partially indexed document.
+    Otherwise falls back to simple text indexing (legacy) into a collection shared per embedding model;
+    each text is tagged with a content signature (doc_sig) and marked complete once fully stored,
+    so re-submitting the same text is skipped.
+    Runs for the same collection are serialized, so a repeated request waits and is then skipped.
+    `client` is the HTTP client used to download the PDF; a temporary one is created if omitted.
     """
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await index_document(text, embedding_model_name, metadata, client)
     metadata = metadata or {}
-    file_hash = metadata.get("file_hash")
-    upload_id = metadata.get("upload_id")
 
     # 1. Determine Collection Name
-    collection_name = get_collection_name(embedding_model_name, file_hash)
-    db_client = QdrantAdapter()
+    collection_name = get_collection_name(embedding_model_name, metadata.get("file_hash"))
+    db_client = get_db()
+
+    async with _index_lock(collection_name):
+        return await _index_locked(text, embedding_model_name, metadata, client, collection_name, db_client)
+
+async def _index_locked(text: str, embedding_model_name: str, metadata: Dict[str, Any], client: httpx.AsyncClient, collection_name: str, db_client: QdrantAdapter):
+    """Body of index_document, run while holding the collection's index lock."""
+    file_hash = metadata.get("file_hash")
+    upload_id = metadata.get("upload_id")
 
     # 2. Check if collection exists
-    if await db_client.collection_exists(collection_name):
-        print(f"Collection {collection_name} already exists. Skipping indexing.", flush=True)
-        return {"status": "skipped", "reason": "exists", "collection": collection_name}
+    if file_hash:
+        if await db_client.collection_exists(collection_name):
+            logger.info("Collection %s already exists. Skipping indexing.", collection_name)
+            return {"status": "skipped", "reason": "exists", "collection": collection_name}
+    else:
+        # Legacy documents share one collection, so skip only a text that was indexed before
+        doc_sig = hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+        if await db_client.collection_exists(collection_name):
+            if await db_client.has_document(collection_name, doc_sig):
+                logger.info("Document %s already indexed in %s. Skipping indexing.", doc_sig, collection_name)
+                return {"status": "skipped", "reason": "exists", "collection": collection_name}
+            # Drop points left by an earlier run for this text that did not complete
+            await db_client.delete_document(collection_name, doc_sig)
+        metadata = {**metadata, "doc_sig": doc_sig}
 
     # 3. Parsing & Chunking
-    chunks = await get_chunks(text, file_hash, upload_id)
+    chunks = await get_chunks(text, file_hash, upload_id, client)
     if not chunks:
         return {"status": "error", "message": "No text extracted"}
 
-    # 4. Embeddings
+    # 4. Embeddings & Storage, pipelined
+    target = f"{collection_name}{STAGING_MARKER}{uuid.uuid4().hex[:8]}" if file_hash else collection_name
     try:
-        vectors = await generate_embeddings(chunks, embedding_model_name)
-        # 5. Storage
-        metadatas_list = [metadata for _ in chunks]
-        await index_chunks_to_db(collection_name, chunks, metadatas_list, vectors, db_client)
+        await embed_and_index_chunks(target, chunks, metadata, embedding_model_name, db_client)
+        # 5. Publish the completed document
+        if file_hash:
+            await db_client.publish_collection(target, collection_name)
+        else:
+            await db_client.mark_document_complete(collection_name, doc_sig)
         return {"status": "success", "chunks_count": len(chunks), "collection": collection_name}
     except Exception as e:
-        print(f"Error indexing: {e}", flush=True)
+        logger.exception("Error indexing: %s", e)
+        await _discard_partial_index(db_client, target, None if file_hash else doc_sig)
         return {"status": "error", "message": str(e)}
+
+async def _discard_partial_index(db_client: QdrantAdapter, collection_name: str, doc_sig: Optional[str]) -> None:
+    """
+    Remove what a failed indexing run stored: its staging collection, or, for legacy texts
+    (doc_sig given), that text's points in the shared collection.
+    """
+    try:
+        if not await db_client.collection_exists(collection_name):
+            return
+        if doc_sig:
+            await db_client.delete_document(collection_name, doc_sig)
+        else:
+            await db_client.delete_collection(collection_name)
+    except Exception:
+        logger.exception("Could not clean up partial index in %s", collection_name)
+
+async def sweep_staging_collections() -> None:
+    """
+    Delete staging collections that were never published (e.g. the service stopped mid-run).
+    Only safe while no indexing run is in flight, so it is called once at startup.
+    """
+    try:
+        stale = await get_db().delete_unpublished_collections(STAGING_MARKER)
+        if stale:
+            logger.info("Deleted %d stale staging collections: %s", len(stale), ", ".join(stale))
+    except Exception:
+        logger.exception("Could not sweep stale staging collections")
@@ -5,8 +5,8 @@ class VectorDBClient(ABC):
     """Abstract base class for Vector Database interactions."""
 
     @abstractmethod
-    async def index_documents(self, collection_name: str, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]):
-        """Index documents into the vector database."""
+    async def index_documents(self, collection_name: str, texts: List[str], metadata: Dict[str, Any], embeddings: List[List[float]], start_index: int = 0):
+        """Index documents into the vector database, sharing one metadata dict across all of them."""
         pass
 
     @abstractmethod
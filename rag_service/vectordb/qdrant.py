@@ -1,15 +1,27 @@
 
 from typing import List, Dict, Any
 import os
+import asyncio
 import uuid
+from functools import lru_cache
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from vectordb.base import VectorDBClient
 
 
+def _doc_sig_filter(doc_sig: str, complete: bool = False) -> models.Filter:
+    """Filter matching the points of one document, optionally only once it is marked complete."""
+    must = [models.FieldCondition(key="doc_sig", match=models.MatchValue(value=doc_sig))]
+    if complete:
+        must.append(models.FieldCondition(key="doc_complete", match=models.MatchValue(value=True)))
+    return models.Filter(must=must)
+
+
 class QdrantAdapter(VectorDBClient):
     """
     Adapter for Qdrant vector database, implementing the VectorDBClient interface.
+    The Qdrant client is synchronous, so every call runs in a worker thread and the event loop
+    keeps serving other work.
     """
     def __init__(self) -> None:
         """Initialize the Qdrant client using environment variables for host and port."""
@@ -22,13 +34,16 @@ class QdrantAdapter(VectorDBClient):
         self,
         collection_name: str,
         texts: List[str],
-        metadatas: List[Dict[str, Any]],
-        embeddings: List[List[float]]
+        metadata: Dict[str, Any],
+        embeddings: List[List[float]],
+        start_index: int = 0
     ) -> None:
         """
         Index documents into the specified Qdrant collection.
         Creates the collection if it does not exist.
         Uses UUIDs for point IDs.
+        `metadata` is shared by every document; each payload also records its `chunk_index`,
+        counted from `start_index` so a document can be indexed in several calls.
         """
         if not embeddings:
             return
@@ -36,8 +51,9 @@ class QdrantAdapter(VectorDBClient):
         dimension = len(embeddings[0])
 
         # Create collection if it does not exist
-        if not self.client.collection_exists(collection_name):
-            self.client.create_collection(
+        if not await asyncio.to_thread(self.client.collection_exists, collection_name):
+            await asyncio.to_thread(
+                self.client.create_collection,
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE),
             )
@@ -46,13 +62,14 @@ class QdrantAdapter(VectorDBClient):
             models.PointStruct(
                 id=str(uuid.uuid4()),
                 vector=vector,
-                payload={"text": text, **metadata}
+                payload={**metadata, "chunk_index": i, "text": text}
             )
-            for text, metadata, vector in zip(texts, metadatas, embeddings)
+            for i, (text, vector) in enumerate(zip(texts, embeddings), start_index)
         ]
 
         # Batch upsert
-        self.client.upsert(
+        await asyncio.to_thread(
+            self.client.upsert,
             collection_name=collection_name,
             points=points
         )
@@ -68,11 +85,12 @@ class QdrantAdapter(VectorDBClient):
         Search for similar vectors in the specified collection.
         Returns a list of dicts with text, metadata, and score.
         """
-        search_result = self.client.query_points(
+        search_result = (await asyncio.to_thread(
+            self.client.query_points,
             collection_name=collection_name,
             query=query_vector,
             limit=limit
-        ).points
+        )).points
 
         results = []
         for hit in search_result:
@@ -85,10 +103,89 @@ class QdrantAdapter(VectorDBClient):
 
 
     async def collection_exists(self, collection_name: str) -> bool:
-        """Check if a collection exists in Qdrant."""
-        return self.client.collection_exists(collection_name)
+        """Check if a collection, or an alias published for one, exists in Qdrant."""
+        def exists() -> bool:
+            if self.client.collection_exists(collection_name):
+                return True
+            return any(a.alias_name == collection_name for a in self.client.get_aliases().aliases)
+
+        return await asyncio.to_thread(exists)
+
+
+    async def publish_collection(self, staging_name: str, collection_name: str) -> None:
+        """
+        Make a fully indexed staging collection available under collection_name, as an alias.
+        The switch is atomic: until it happens, collection_name does not exist for readers.
+        """
+        await asyncio.to_thread(
+            self.client.update_collection_aliases,
+            change_aliases_operations=[
+                models.CreateAliasOperation(
+                    create_alias=models.CreateAlias(collection_name=staging_name, alias_name=collection_name)
+                )
+            ],
+        )
+
+
+    async def delete_unpublished_collections(self, marker: str) -> List[str]:
+        """
+        Delete the collections whose name contains marker and that no alias points to,
+        i.e. staging collections left by indexing runs that never published. Returns their names.
+        """
+        def sweep() -> List[str]:
+            published = {a.collection_name for a in self.client.get_aliases().aliases}
+            stale = [
+                c.name for c in self.client.get_collections().collections
+                if marker in c.name and c.name not in published
+            ]
+            for name in stale:
+                self.client.delete_collection(collection_name=name)
+            return stale
+
+        return await asyncio.to_thread(sweep)
+
+
+    async def mark_document_complete(self, collection_name: str, doc_sig: str) -> None:
+        """Flag every point of the document with this signature as completely indexed."""
+        await asyncio.to_thread(
+            self.client.set_payload,
+            collection_name=collection_name,
+            payload={"doc_complete": True},
+            points=_doc_sig_filter(doc_sig),
+        )
+
+
+    async def delete_document(self, collection_name: str, doc_sig: str) -> None:
+        """Delete every point of the document with this signature (e.g. left by an incomplete run)."""
+        await asyncio.to_thread(
+            self.client.delete,
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=_doc_sig_filter(doc_sig)),
+        )
+
+
+    async def has_document(self, collection_name: str, doc_sig: str) -> bool:
+        """
+        Check if the document with this signature was completely indexed into the collection.
+        Points indexed before doc_sig was recorded have none, so such texts are indexed once more.
+        """
+        points, _ = await asyncio.to_thread(
+            self.client.scroll,
+            collection_name=collection_name,
+            scroll_filter=_doc_sig_filter(doc_sig, complete=True),
+            limit=1,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return bool(points)
 
 
     async def delete_collection(self, collection_name: str) -> None:
         """Delete a collection from Qdrant."""
-        self.client.delete_collection(collection_name=collection_name)
+        await asyncio.to_thread(self.client.delete_collection, collection_name=collection_name)
+
+
+@lru_cache(maxsize=1)
+def get_db() -> QdrantAdapter:
+    """Return the process-wide QdrantAdapter, created on first use, so its client connection is reused."""
+    return QdrantAdapter()